@@ -0,0 +1,204 @@
+# MIT License
+#
+# (C) Copyright [2026] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+""" Content addressed cache of generated manifests """
+import functools
+import hashlib
+import os
+import tempfile
+
+from manifestgen import ioutils, stats, validator
+
+# Default maximum size of a cache directory, in bytes
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+ENTRY_SUFFIX = '.manifest'
+
+
+def _digest_update(digest, data):
+    """ Add length prefixed data to digest, so consecutive inputs can not run
+    into each other """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    digest.update(len(data).to_bytes(8, 'big'))
+    digest.update(data)
+
+
+def environment_digest():
+    """ Digest of everything besides the inputs that output depends on: the
+    manifestgen version, the validation schemas and the yaml backend.
+    """
+    return _environment_digest(ioutils.get_backend())
+
+
+@functools.lru_cache(maxsize=None)
+def _environment_digest(backend):
+    """ `environment_digest` for a yaml backend """
+    # pylint: disable=import-outside-toplevel
+    from importlib import metadata
+    digest = hashlib.sha256()
+    _digest_update(digest, backend)
+    try:
+        _digest_update(digest, metadata.version('manifestgen'))
+    except metadata.PackageNotFoundError:  # pragma: NO COVER
+        _digest_update(digest, '')
+    for schema_file in validator.schema_files():
+        _digest_update(digest, os.path.basename(schema_file))
+        with open(schema_file, 'rb') as f:
+            _digest_update(digest, f.read())
+    return digest.hexdigest()
+
+
+def _values_digest(digest, values_path):
+    """ Add the names and contents of the files in values_path to digest """
+    for name in sorted(os.listdir(values_path)):
+        path = os.path.join(values_path, name)
+        if os.path.isfile(path):
+            _digest_update(digest, name)
+            with open(path, 'rb') as f:
+                _digest_update(digest, f.read())
+
+
+class OutputCache:
+    """ Generated manifests stored by a hash of everything they were generated
+    from. Each entry holds a checksum of the manifest, entries that do not
+    match it are dropped. The least recently used entries are evicted once the
+    directory grows over `max_size` bytes.
+    """
+
+    def __init__(self, directory, max_size=DEFAULT_MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+
+    @staticmethod
+    def key(manifest, customizations=None, values_path=None):
+        """ Get the cache key for generating the manifest text with the
+        customizations text and values files in the values_path directory.
+        """
+        digest = hashlib.sha256()
+        _digest_update(digest, environment_digest())
+        _digest_update(digest, manifest)
+        _digest_update(digest, customizations if customizations is not None else '')
+        if values_path:
+            _values_digest(digest, values_path)
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ENTRY_SUFFIX)
+
+    def _entries(self):
+        """ Get the paths of all entries """
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return [os.path.join(self.directory, name) for name in names
+                if name.endswith(ENTRY_SUFFIX)]
+
+    @staticmethod
+    def _read(path):
+        """ Read the manifest of the entry at path, None if it is corrupt """
+        with open(path, 'rb') as f:
+            header = f.readline()
+            data = f.read()
+        if header != f'sha256 {hashlib.sha256(data).hexdigest()}\n'.encode('ascii'):
+            return None
+        return data.decode('utf-8')
+
+    def get(self, key):
+        """ Get the manifest stored for key, None if there is none """
+        path = self._path(key)
+        try:
+            data = self._read(path)
+            if data is None:
+                os.remove(path)
+            else:
+                # Keep recently used entries from being evicted
+                os.utime(path)
+        except (OSError, UnicodeDecodeError):
+            data = None
+        stats.count('cache_hits' if data is not None else 'cache_misses')
+        return data
+
+    def put(self, key, manifest):
+        """ Store the generated manifest text for key, then evict entries
+        over the size limit. The cache is only an optimization, failing to
+        write it is not an error.
+        """
+        data = manifest.encode('utf-8')
+        header = f'sha256 {hashlib.sha256(data).hexdigest()}\n'.encode('ascii')
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=self.directory, delete=False) as f:
+                try:
+                    f.write(header)
+                    f.write(data)
+                    f.close()
+                    os.replace(f.name, self._path(key))
+                except BaseException:
+                    # Do not leave temporary files behind, evict never sees them
+                    f.close()
+                    os.remove(f.name)
+                    raise
+        except OSError:
+            return
+        self.evict()
+
+    def evict(self):
+        """ Remove the least recently used entries until the cache fits in
+        max_size bytes. Returns the number of entries removed.
+        """
+        entries = []
+        for path in self._entries():
+            try:
+                st = os.stat(path)
+            except OSError:  # pragma: NO COVER
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:  # pragma: NO COVER
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def verify(self):
+        """ Check the checksum of every entry, removing the ones that do not
+        match. Returns the paths of the removed entries.
+        """
+        corrupt = []
+        for path in sorted(self._entries()):
+            try:
+                ok = self._read(path) is not None
+            except UnicodeDecodeError:
+                ok = False
+            except OSError:  # pragma: NO COVER
+                continue
+            if not ok:
+                os.remove(path)
+                corrupt.append(path)
+        return corrupt
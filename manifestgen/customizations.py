@@ -21,77 +21,362 @@
 # OTHER DEALINGS IN THE SOFTWARE.
 """ Various Schema objects that are passed in via yaml files """
 # pylint: disable=invalid-name,no-else-raise,no-else-return,unnecessary-pass
+import functools
 import re
+import threading
 from collections.abc import MutableMapping, MutableSequence
 
-import jinja2
 import yaml
 
-from manifestgen import filters, ioutils
+from manifestgen import filters, ioutils, stats
 from manifestgen.schema import BaseSchema
 
+# Strings holding any of these are rendered via jinja
+TEMPLATE_RE = re.compile(r'\{\{(.*)\}\}')
 
-jinjaEnv = jinja2.Environment()
-filters.load(jinjaEnv)
+# Templates that are one `{{ expression }}` can be evaluated natively
+EXPRESSION_RE = re.compile(r'\{\{(.*)\}\}', re.DOTALL)
 
+# Single line strings that can be a plain YAML scalar
+PLAIN_RE = re.compile(r'[\w./][\w ./+=@-]*(?<! )\Z')
 
-def render(obj, ctx, rerun):
+_resolver = yaml.resolver.Resolver()
+
+_UNSET = object()
+
+# Maximum number of compiled templates kept in memory per process
+TEMPLATE_CACHE_SIZE = 4096
+
+
+_jinja_env = None
+_jinja_env_lock = threading.Lock()
+
+
+def get_jinja_env():
+    """ Get the shared jinja environment. jinja is only imported once the
+    first template is compiled, keeping it out of runs that never render.
+    """
+    global _jinja_env  # pylint: disable=global-statement
+    if _jinja_env is None:
+        with _jinja_env_lock:
+            if _jinja_env is None:
+                import jinja2  # pylint: disable=import-outside-toplevel
+                env = jinja2.Environment()
+                filters.load(env)
+                _jinja_env = env
+    return _jinja_env
+
+
+def __getattr__(name):
+    # `jinjaEnv` used to be created at import time
+    if name == 'jinjaEnv':
+        return get_jinja_env()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@functools.lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def compile_template(source):
+    """ Compile a jinja template, re-using a cached copy for the same source.
+    Hit/miss counters are available via `compile_template.cache_info()`.
+    """
+    stats.count('templates_compiled')
+    return get_jinja_env().from_string(source)
+
+
+@functools.lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def compile_expression(source):
+    """ Compile a template consisting of exactly one `{{ expression }}` into a
+    callable returning the expression's python value. None for any other
+    template.
+    """
+    match = EXPRESSION_RE.fullmatch(source)
+    if not match or any(m in match.group(1) for m in ('{{', '}}', '{%', '{#')):
+        return None
+    import jinja2  # pylint: disable=import-outside-toplevel
+    stats.count('templates_compiled')
+    try:
+        return get_jinja_env().compile_expression(match.group(1), undefined_to_none=False)
+    except jinja2.TemplateSyntaxError:
+        return None
+
+
+def is_template(obj):
+    """ Check whether obj is a string with jinja template markers """
+    # The substring test is much cheaper than the regex for plain values
+    return isinstance(obj, str) and '{{' in obj and TEMPLATE_RE.search(obj) is not None
+
+
+def _from_yaml(s):
+    """ Convert a rendered string to a python type by parsing it as YAML """
+    try:
+        _obj = yaml.safe_load(s)
+    except yaml.error.YAMLError:
+        _obj = s
+    else:
+        # If there is a # in the string the yaml load strips it.
+        # Which is why _obj will be nothing here. So revert
+        # back to the rendered string instead.
+        if _obj is None:
+            _obj = s
+    return _obj
+
+
+def _from_string(s):
+    """ Same as `_from_yaml`, skipping the parser for strings YAML would
+    read back unchanged. """
+    if PLAIN_RE.match(s) and _resolver.resolve(
+            yaml.ScalarNode, s, (True, False)) == 'tag:yaml.org,2002:str':
+        return s
+    return _from_yaml(s)
+
+
+def _native_copy(value, nested=False):
+    """ Copy a python value if parsing its string form as YAML gives the same
+    value back, otherwise return _UNSET. Subclasses of str, such as the
+    Markup escaping filters return, go through their string form. """
+    # pylint: disable=too-many-return-statements, unidiomatic-typecheck
+    if type(value) in (bool, int):
+        return value
+    if type(value) is str:
+        if not nested:
+            return _from_string(value)
+        # Nested strings are written as quoted flow scalars by str()
+        return value if repr(value) == f"'{value}'" else _UNSET
+    if isinstance(value, list):
+        items = [_native_copy(i, True) for i in value]
+        return _UNSET if _UNSET in items else items
+    if isinstance(value, dict):
+        items = {}
+        for k, v in value.items():
+            if isinstance(k, str) and len(k) > 1000:
+                # Too long to be an implicit YAML key
+                return _UNSET
+            k, v = _native_copy(k, True), _native_copy(v, True)
+            if k is _UNSET or v is _UNSET:
+                return _UNSET
+            items[k] = v
+        return items
+    return _UNSET
+
+
+def render_string(source, ctx, native=True):
+    """ Render a template string and convert the result to a python type.
+
+    With `native`, templates made of a single expression are evaluated to a
+    python object directly, and only fall back to YAML parsing the rendered
+    string when YAML would read that string back as something else.
+    """
+    stats.count('strings_rendered')
+    if native:
+        expr = compile_expression(source)
+        if expr is None:
+            return _from_string(compile_template(source).render(ctx))
+        from jinja2 import Undefined  # pylint: disable=import-outside-toplevel
+        value = expr(ctx)
+        if not isinstance(value, Undefined):
+            _obj = _native_copy(value)
+            if _obj is not _UNSET:
+                return _obj
+        return _from_yaml(str(value))
+    return _from_yaml(compile_template(source).render(ctx))
+
+
+def render(obj, ctx, rerun, native=True):
     """recursively attempt to render the given object via jinja"""
     if isinstance(obj, str):
         # We only want to render a string with the special keys. Otherwise,
         # would could inadvertently lose newlines.
-        if re.search(r'\{\{(.*)\}\}', obj):
-            s = jinjaEnv.from_string(obj).render(ctx)
-            try:
-                _obj = yaml.safe_load(s)
-            except yaml.error.YAMLError:
-                _obj = s
-            else:
-                # If there is a # in the string the yaml load strips it.
-                # Which is why _obj will be nothing here. So revert
-                # back to the rendered string instead.
-                if _obj is None:
-                    _obj = s
-            return (_obj, True)
+        if is_template(obj):
+            return (render_string(obj, ctx, native), True)
         else:
             # Return original object since there was nothing to render
             return (obj, rerun)
     if isinstance(obj, MutableMapping):
         for key in obj:
-            obj[key], rerun = render(obj[key], ctx, rerun)
+            obj[key], rerun = render(obj[key], ctx, rerun, native)
     elif isinstance(obj, MutableSequence):
         for idx, item in enumerate(obj):
-            obj[idx], rerun = render(item, ctx, rerun)
+            obj[idx], rerun = render(item, ctx, rerun, native)
     return (obj, rerun)
 
 
+def _collect_refs(node, refs):
+    """ Collect the context paths a jinja AST node reads from """
+    from jinja2 import nodes  # pylint: disable=import-outside-toplevel
+    if isinstance(node, nodes.Call) and isinstance(node.node, nodes.Getattr):
+        # A method call, e.g. net.get('y'), reads the object it is called on
+        _collect_refs(node.node.node, refs)
+        for child in node.iter_child_nodes():
+            if child is not node.node:
+                _collect_refs(child, refs)
+        return
+    keys = []
+    base = node
+    while isinstance(base, (nodes.Getattr, nodes.Getitem)):
+        if isinstance(base, nodes.Getattr):
+            keys.append(base.attr)
+        elif isinstance(base.arg, nodes.Const):
+            keys.append(base.arg.value)
+        else:
+            # Dynamic subscript, only the path leading up to it is known
+            keys = []
+            _collect_refs(base.arg, refs)
+        base = base.node
+    if isinstance(base, nodes.Name):
+        if base.ctx == 'load':
+            refs.add((base.name,) + tuple(reversed(keys)))
+        return
+    for child in base.iter_child_nodes():
+        _collect_refs(child, refs)
+
+
+@functools.lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def template_refs(source):
+    """ Get the context paths (as key tuples) referenced by a template """
+    from jinja2 import meta  # pylint: disable=import-outside-toplevel
+    ast = get_jinja_env().parse(source)
+    refs = set()
+    _collect_refs(ast, refs)
+    # Drop names the template assigns itself, e.g. loop variables
+    undeclared = meta.find_undeclared_variables(ast)
+    return frozenset(ref for ref in refs if ref[0] in undeclared)
+
+
+def _find_templates(obj, path):
+    if isinstance(obj, str):
+        if is_template(obj):
+            yield (path, obj)
+    elif isinstance(obj, MutableMapping):
+        for key in obj:
+            yield from _find_templates(obj[key], path + (key,))
+    elif isinstance(obj, MutableSequence):
+        for idx, item in enumerate(obj):
+            yield from _find_templates(item, path + (idx,))
+
+
+def index_templates(obj, path=()):
+    """ Map the path (as a key tuple) of every templated string within obj to
+    its template source. Paths are prefixed with `path`.
+    """
+    return dict(_find_templates(obj, path))
+
+
+def _format_path(path):
+    return '.'.join(str(k) for k in path)
+
+
+def _dependencies(templates):
+    """ Map each templated path to the (templated path, soft) pairs it
+    references. References through a container the path itself is in are
+    soft: they order rendering where they can, but are not cycles.
+    """
+    # Every prefix of a templated path -> templated paths below it
+    below = {}
+    for path in templates:
+        for i in range(1, len(path) + 1):
+            below.setdefault(path[:i], []).append(path)
+    deps = {}
+    for path, source in templates.items():
+        found = []
+        for ref in sorted(template_refs(source), key=_format_path):
+            # Templated values within the referenced subtree
+            soft = len(ref) < len(path) and path[:len(ref)] == ref
+            found.extend((dep, soft) for dep in below.get(ref, ()) if not soft or dep != path)
+            # Templated value the referenced path is nested in
+            found.extend((ref[:i], False) for i in range(1, len(ref)) if ref[:i] in templates)
+        deps[path] = found
+    return deps
+
+
+def _render_order(templates):
+    """ Topologically sort templated paths so references render first """
+    deps = _dependencies(templates)
+    order = []
+    state = {}  # path -> False while visiting, True once ordered
+    for root in templates:
+        if root in state:
+            continue
+        state[root] = False
+        stack = [(root, iter(deps[root]))]
+        while stack:
+            path, children = stack[-1]
+            for child, soft in children:
+                if child not in state:
+                    state[child] = False
+                    stack.append((child, iter(deps[child])))
+                    break
+                if state[child] is False and not soft:
+                    cycle = [p for p, _ in stack]
+                    cycle = cycle[cycle.index(child):] + [child]
+                    raise ValueError("Reference cycle detected in customizations: "
+                                     + ' -> '.join(_format_path(p) for p in cycle))
+            else:
+                stack.pop()
+                state[path] = True
+                order.append(path)
+    return order
+
+
+def _set_path(obj, path, value):
+    for key in path[:-1]:
+        obj = obj[key]
+    obj[path[-1]] = value
+
+
+def resolve(spec, native=True):
+    """ Render every templated value in spec once, after the values it
+    references have been rendered. Raises ValueError on reference cycles.
+    See `render_string` for `native`.
+    """
+    # The full document is only walked once, later rounds only look at the
+    # values rendered in the previous round.
+    templates = index_templates(spec)
+    while templates:
+        stats.count('render_passes')
+        produced = {}
+        for path in _render_order(templates):
+            value = render_string(templates[path], spec, native)
+            _set_path(spec, path, value)
+            # Rendered values may themselves contain templates
+            produced.update(index_templates(value, path))
+        templates = produced
+    return spec
+
+
 class Customizations(BaseSchema):
     """ Customizations """
 
     @classmethod
     def load(cls, fp, fixme="~FIXME~"):
         """ Load customizations """
-        # Read lines looking for fixme values
-        data = ""
+        obj = cls.parse(fp, fixme)
+        # Render templated values in obj in dependency order
+        with stats.stage('render'):
+            resolve(obj['spec'])
+        return cls(obj)
+
+    @staticmethod
+    def parse(fp, fixme="~FIXME~"):
+        """ Parse customizations without rendering them """
+        data = fp.read() if hasattr(fp, 'read') else ''.join(fp)
+        # Look for fixme values, only the lines holding one are inspected
         found_fixmes = []
-        for num, line in enumerate(fp, 1):
-            try:
-                strippedl = line.lstrip()
-                if strippedl and strippedl[0] != "#" and fixme in line:
-                    found_fixmes.append(f"Line {num}: {line}")
-            except IndexError:
-                print(line)
-                raise
-            data += line
+        num, pos = 1, 0
+        idx = data.find(fixme) if fixme else -1
+        while idx != -1:
+            start = data.rfind('\n', 0, idx) + 1
+            end = data.find('\n', idx) + 1 or len(data)
+            num += data.count('\n', pos, start)
+            pos = start
+            line = data[start:end]
+            if line.lstrip()[0] != "#":
+                found_fixmes.append(f"Line {num}: {line}")
+            idx = data.find(fixme, end)
         if found_fixmes:
             raise ValueError(f"{fixme} detected:\n {''.join(found_fixmes)}")
         # Load data
-        obj = ioutils.load(data)
-        # Recursively render templated values in obj
-        rerun = True
-        while rerun:
-            obj['spec'], rerun = render(obj['spec'], obj['spec'], False)
-        return cls(obj)
+        with stats.stage('parse'):
+            return ioutils.load(data)
 
     CHARTS_REF = 'spec.kubernetes.services'
 
@@ -24,20 +24,46 @@
 # pylint: disable=invalid-name, broad-except
 
 import argparse
+import atexit
+import io
+import json
 import os
 import sys
 import traceback
 import warnings
+from itertools import repeat
 
-import pkg_resources
-
-from manifestgen import ioutils
+from manifestgen import ioutils, stats
+from manifestgen.cache import DEFAULT_MAX_SIZE, OutputCache
 from manifestgen.customizations import Customizations
+from manifestgen.passthrough import generate as generate_passthrough
 from manifestgen.schema import new_schema
 
 
 CHART_PACKAGE_TYPE = '.tgz'
-version = pkg_resources.get_distribution("manifestgen").version
+
+
+def get_version():
+    """ Get the installed manifestgen version """
+    from importlib import metadata  # pylint: disable=import-outside-toplevel
+    return metadata.version("manifestgen")
+
+
+class VersionAction(argparse.Action):
+    """ Like argparse's `version` action, only looking the version up when
+    it is asked for.
+    """
+
+    def __init__(self, option_strings, dest=argparse.SUPPRESS, default=argparse.SUPPRESS,
+                 help=None):
+        # pylint: disable=redefined-builtin
+        super().__init__(option_strings=option_strings, dest=dest, default=default,
+                         nargs=0, help=help)
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        print(f'{parser.prog} {get_version()}')
+        parser.exit()
+
 
 def get_args(): # pragma: NO COVER
     """Get args"""
@@ -46,10 +72,43 @@ def get_args(): # pragma: NO COVER
     parser.add_argument('-c', '--customizations',     metavar='FILE', type=argparse.FileType('r'), help='Customizations file')
     parser.add_argument('-i', '--in',  dest='input',  metavar='FILE', type=argparse.FileType('r'), default=sys.stdin,  help='Input file')
     parser.add_argument('-o', '--out', dest='output', metavar='FILE', type=argparse.FileType('w'), default=sys.stdout, help='Output file')
+    parser.add_argument('manifests', metavar='MANIFEST', nargs='*', help='Manifest files, or directories of them, to generate in one run instead of --in/--out. Requires --out-dir.')
+    parser.add_argument('--out-dir', metavar='DIR', help='Output directory for MANIFEST files')
+    parser.add_argument('-j', '--jobs', metavar='N', type=int, default=1, help='Number of processes to generate MANIFEST files with.')
     parser.add_argument('--validate', default=False, action='store_true', help='Validate an existing manifest file.')
+    parser.add_argument('--full-validation', default=False, action='store_true', help='Validate every release after generating, not only the customized ones.')
+    parser.add_argument('--workers', metavar='N', type=int, default=1, help='Number of processes to validate releases with.')
+    parser.add_argument('--cache-dir', metavar='DIR', help='Directory to cache generated manifests in. A run with the same inputs as a cached one writes the cached manifest without generating it again.')
+    parser.add_argument('--cache-size', metavar='MB', type=int, default=DEFAULT_MAX_SIZE // 2**20, help='Maximum size of --cache-dir, least recently used manifests are evicted past it.')
+    parser.add_argument('--cache-verify', default=False, action='store_true', help='Check the manifests in --cache-dir against their checksums, removing corrupt ones, and exit.')
+    parser.add_argument('--stream', default=False, action='store_true', help='Generate (or with --validate, validate) every document of a multi-document --in stream, writing each one out before reading the next.')
+    parser.add_argument('--deps', metavar='FILE', help='Record the inputs every release is generated from in FILE. With --previous, releases generated from the same inputs as FILE records are copied from the previous output.')
+    parser.add_argument('--previous', metavar='FILE', help='Output of the run that wrote --deps, to copy unchanged releases from. Can not be the --out file.')
+    parser.add_argument('--passthrough', default=False, action='store_true', help='Copy releases without customizations from --in to --out as they are, without validating them.')
+    parser.add_argument('--timings', metavar='FILE', nargs='?', const='-', help='Write a JSON report of the time and CPU time of each stage, and of internal counters, to FILE or stderr. Work done in --jobs/--workers processes is not included.')
+    parser.add_argument('--timings-memory', default=False, action='store_true', help='Also report the peak memory of each stage in --timings. Tracking memory makes the run several times slower, and skews the times of the stages.')
     parser.add_argument('--values-path', metavar='PATH', help='DEPRECATED: Path to chart_name.yaml files to be passed as values.yaml to charts.')
-    parser.add_argument('--version', action='version', version=f'%(prog)s {version}')
+    parser.add_argument('--version', action=VersionAction, help="show program's version number and exit")
     args = parser.parse_args()
+    if args.manifests and not args.out_dir and not args.validate:
+        parser.error("--out-dir is required when generating MANIFEST files")
+    if args.cache_verify and not args.cache_dir:
+        parser.error("--cache-verify requires --cache-dir")
+    if args.cache_dir and args.manifests:
+        parser.error("--cache-dir can not be used with MANIFEST files")
+    if args.stream and (args.manifests or args.cache_dir or args.deps):
+        parser.error("--stream can not be used with MANIFEST files, --cache-dir or --deps")
+    if args.timings_memory and not args.timings:
+        parser.error("--timings-memory requires --timings")
+    if args.previous and not args.deps:
+        parser.error("--previous requires --deps")
+    if args.deps and (args.manifests or args.cache_dir or args.values_path):
+        parser.error("--deps can not be used with MANIFEST files, --cache-dir or --values-path")
+    if args.passthrough and any((args.manifests, args.validate, args.stream, args.cache_dir,
+                                 args.deps, args.values_path, args.full_validation)):
+        parser.error("--passthrough can only be used generating --in to --out without --validate, --stream, --cache-dir, --deps, --values-path or --full-validation")
+    if args.previous and os.path.abspath(args.previous) == os.path.abspath(args.output.name):
+        parser.error("--previous can not be the --out file, it is emptied before it is read")
     if args.values_path:
         warnings.warn("Option --values-path is deprecated and will be removed, use --customizations instead", DeprecationWarning, stacklevel=2)
     return args
@@ -65,58 +124,283 @@ def get_local_values(a_dir, chart_name):
         return ioutils.load(fp)
 
 
-def manifestgen(manifest, customizations=None, values_path=None):
-    """ Generate the manifest """
-    # pylint: disable=too-many-branches
-    updated_charts = []
-    for chart in manifest.get_releases():
-        # Merge values file into chart
+def manifestgen(manifest, customizations=None, values_path=None, full_validation=False,
+                workers=None):
+    """ Generate the manifest. Only the releases that were changed are
+    validated afterwards, unless `full_validation` is set. See
+    `Manifest.validate` for `workers`.
+    """
+    changed = set()
+    with stats.stage('merge'):
+        # Merge values files into charts
         if values_path:
-            values = get_local_values(values_path, chart.get(manifest.RELEASE_NAME_REF))
-            if values:
-                chart.set_deep(manifest.RELEASE_VALUES_REF, values)
-        # Merge customizations into chart
+            for idx, chart in enumerate(manifest.get(manifest.CHARTS_REF, [])):
+                values = get_local_values(values_path, manifest.release_name(chart))
+                if values:
+                    manifest.update_release(idx, manifest.RELEASE_VALUES_REF, values)
+                    changed.add(idx)
+        # Merge customizations into the charts they name
         if customizations:
-            values = customizations.get_chart(chart.get(manifest.RELEASE_NAME_REF))
-            if values:
-                chart.set_deep(manifest.RELEASE_VALUES_REF, values, update=True)
-        # Save updated chart
-        updated_charts.append(chart)
-    # Update manifest charts
-    manifest.set_releases(updated_charts)
+            for name, indices in manifest.release_index().items():
+                values = customizations.get_chart(name)
+                if values:
+                    for idx in indices:
+                        manifest.update_release(idx, manifest.RELEASE_VALUES_REF, values,
+                                                update=True)
+                        changed.add(idx)
     # Make sure updates are valid
-    manifest.validate()
+    manifest.validate(None if full_validation else sorted(changed), workers)
     return manifest
 
 
+def generate_text(manifest_text, customizations_text=None, *, values_path=None, cache=None,
+                  full_validation=False, workers=None, passthrough=False):
+    """ Generate a manifest given as yaml text with the customizations yaml
+    text, and return the output yaml text. Given an `OutputCache`, output
+    cached for the same inputs is returned without loading anything, and new
+    output is cached. With `passthrough`, releases without customizations are
+    copied to the output verbatim, see `passthrough.generate`.
+    """
+    # pylint: disable=too-many-arguments
+    if passthrough and (values_path or cache is not None or full_validation):
+        raise ValueError("passthrough can not be used with values_path, cache or full_validation")
+    if cache is not None:
+        key = cache.key(manifest_text, customizations_text, values_path)
+        output = cache.get(key)
+        if output is not None:
+            return output
+    customizations = None
+    if customizations_text is not None:
+        customizations = Customizations.load(io.StringIO(customizations_text))
+        customizations.validate()
+    if passthrough:
+        return generate_passthrough(manifest_text, customizations, workers=workers)
+    with stats.stage('parse'):
+        manifest = new_schema(ioutils.load(manifest_text))
+    manifest.validate(workers=workers)
+    manifestgen(manifest, customizations, values_path, full_validation, workers)
+    output = manifest.dump()
+    if cache is not None:
+        cache.put(key, output)
+    return output
+
+
+def generate_incremental(manifest_text, customizations_text, deps_path, previous_path=None, *,
+                         full_validation=False, workers=None):
+    """ `generate_text` only regenerating the releases whose inputs changed
+    since the run that wrote `deps_path` and the output at `previous_path`.
+    See `manifestgen.incremental`. The dependencies of this run are written
+    to `deps_path`.
+    """
+    # pylint: disable=too-many-arguments, import-outside-toplevel
+    from manifestgen import incremental
+    previous = previous_deps = None
+    if previous_path:
+        try:
+            with open(deps_path, encoding='utf-8') as f:
+                previous_deps = json.load(f)
+            with open(previous_path, encoding='utf-8') as f:
+                previous = f.read()
+        except (OSError, ValueError) as e:
+            print(f"warning: regenerating every release, no previous run: {e}", file=sys.stderr)
+            previous = previous_deps = None
+    output, deps = incremental.generate(manifest_text, customizations_text, previous,
+                                        previous_deps, full_validation=full_validation,
+                                        workers=workers)
+    with open(deps_path, 'w', encoding='utf-8') as f:
+        json.dump(deps, f, default=str)
+    return output
+
+
+def generate_stream(input_stream, output_stream, customizations=None, *, values_path=None,
+                    validate_only=False, full_validation=False, workers=None):
+    """ Generate every manifest in a multi-document yaml input stream into the
+    output stream. Each document is written out before the next one is read,
+    so only one of them is held in memory. Returns the number of documents.
+    """
+    # pylint: disable=too-many-arguments
+    count = 0
+    for data in ioutils.load_all(input_stream):
+        if data is None:
+            # Empty document
+            continue
+        count += 1
+        manifest = new_schema(data)
+        manifest.validate(workers=workers)
+        if validate_only:
+            continue
+        manifestgen(manifest, customizations, values_path, full_validation, workers)
+        manifest.dump(stream=output_stream, explicit_start=True)
+        output_stream.flush()
+    return count
+
+
+def find_manifests(paths):
+    """ Expand directories in paths to the yaml files directly inside them """
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found.extend(sorted(os.path.join(path, f) for f in os.listdir(path)
+                                if f.endswith(('.yaml', '.yml'))))
+        else:
+            found.append(path)
+    return found
+
+
+def generate_file(path, out_dir, customizations=None, *, values_path=None, validate_only=False,
+                  full_validation=False, workers=None):
+    """ Validate the manifest in path and generate it into out_dir, under the
+    same file name. Returns the output path, None if only validating.
+    """
+    # pylint: disable=too-many-arguments
+    with open(path, encoding='utf-8') as f, stats.stage('parse'):
+        manifest = new_schema(ioutils.load(f))
+    manifest.validate(workers=workers)
+    if validate_only:
+        return None
+    manifestgen(manifest, customizations, values_path, full_validation, workers)
+    output = os.path.join(out_dir, os.path.basename(path))
+    with open(output, 'w', encoding='utf-8') as f:
+        manifest.dump(stream=f)
+    return output
+
+
+# Arguments shared by all manifests of a batch, set in worker processes
+_batch_args = None
+
+
+def _init_batch_worker(customizations, kwds):
+    # pylint: disable=global-statement
+    global _batch_args
+    _batch_args = (customizations, kwds)
+
+
+def _generate_batch_file(path, out_dir, customizations, kwds):
+    """ `generate_file`, returning the formatted traceback on failure """
+    try:
+        generate_file(path, out_dir, customizations, **kwds)
+    except Exception:
+        return traceback.format_exc()
+    return None
+
+
+def _generate_batch_worker(path, out_dir):
+    return _generate_batch_file(path, out_dir, *_batch_args)
+
+
+def generate_batch(paths, out_dir, customizations=None, jobs=None, **kwds):
+    """ Generate every manifest in paths into out_dir, see `generate_file` for
+    kwds. A failing manifest is reported to stderr without stopping the rest.
+    Returns the list of paths that failed.
+
+    With more than one of `jobs`, manifests are generated in a process pool.
+    Customizations are handed to each worker once, when it starts.
+    """
+    names = [os.path.basename(path) for path in paths]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Manifests would overwrite each other in {out_dir}: "
+                         f"{', '.join(duplicates)}")
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+
+    if jobs and jobs > 1 and len(paths) > 1:
+        from concurrent.futures import ProcessPoolExecutor  # pylint: disable=import-outside-toplevel
+        with ProcessPoolExecutor(max_workers=min(jobs, len(paths)),
+                                 initializer=_init_batch_worker,
+                                 initargs=(customizations, kwds)) as pool:
+            errors = list(pool.map(_generate_batch_worker, paths, repeat(out_dir)))
+    else:
+        errors = (_generate_batch_file(path, out_dir, customizations, kwds) for path in paths)
+
+    # Report in input order whichever way the manifests were generated
+    failed = []
+    for path, error in zip(paths, errors):
+        if error:
+            print(f"error: failed to generate manifest {path}", file=sys.stderr)
+            print(error, end='', file=sys.stderr)
+            failed.append(path)
+    return failed
+
+
+def _generate_output(args, customizations_text): # pragma: NO COVER
+    """ Generate the --in manifest into --out """
+    cache = None
+    if args.cache_dir:
+        cache = OutputCache(args.cache_dir, args.cache_size * 2**20)
+    with args.input as f:
+        manifest_text = f.read()
+    if args.deps:
+        output = generate_incremental(manifest_text, customizations_text, args.deps,
+                                      args.previous, full_validation=args.full_validation,
+                                      workers=args.workers)
+    else:
+        output = generate_text(manifest_text, customizations_text,
+                               values_path=args.values_path, cache=cache,
+                               full_validation=args.full_validation, workers=args.workers,
+                               passthrough=args.passthrough)
+    # Output updated manifest
+    with args.output as f:
+        f.write(output)
+
+
 def main(): # pragma: NO COVER
     """ Main entrypoint """
+    if sys.argv[1:2] == ['serve']:
+        # pylint: disable=import-outside-toplevel, cyclic-import
+        from manifestgen import server
+        server.main(sys.argv[2:])
+        return
     args = get_args()
+    if args.timings:
+        stats.enable(memory=args.timings_memory)
+        atexit.register(stats.write_report, args.timings)
 
     try:
-        # Validate customizations immediately to fail early
-        customizations = None
-        if args.customizations:
-            with (args.customizations):
-                customizations = Customizations.load(args.customizations)
-                customizations.validate()
+        if args.cache_verify:
+            corrupt = OutputCache(args.cache_dir).verify()
+            for path in corrupt:
+                print(f"removed corrupt cache entry: {path}", file=sys.stderr)
+            sys.exit(1 if corrupt else 0)
 
-        # Validate manifest
-        with args.input as f:
-            manifest = new_schema(ioutils.load(f))
-        manifest.validate()
+        customizations_text = None
+        if args.customizations:
+            with args.customizations as f:
+                customizations_text = f.read()
 
-        # Early abort if only validating
-        if args.validate:
+        # Generate manifest based on customizations
+        if not args.manifests and not args.validate and not args.stream:
+            _generate_output(args, customizations_text)
             sys.exit(0)
 
-        # Generate manifest based on customizations
-        manifestgen(manifest, customizations, args.values_path)
+        # Validate customizations immediately to fail early
+        customizations = None
+        if customizations_text is not None:
+            customizations = Customizations.load(io.StringIO(customizations_text))
+            customizations.validate()
+
+        # Generate every document of the input
+        if args.stream:
+            with args.input as fin, args.output as fout:
+                generate_stream(fin, fout, customizations, values_path=args.values_path,
+                                validate_only=args.validate,
+                                full_validation=args.full_validation, workers=args.workers)
+            sys.exit(0)
 
-        # Output updated manifest
-        with args.output as f:
-            manifest.dump(stream=f)
+        # Generate many manifests with the same customizations
+        if args.manifests:
+            paths = find_manifests(args.manifests)
+            failed = generate_batch(paths, args.out_dir, customizations, args.jobs,
+                                    values_path=args.values_path, validate_only=args.validate,
+                                    full_validation=args.full_validation, workers=args.workers)
+            print(f"{len(paths) - len(failed)} of {len(paths)} manifests succeeded",
+                  file=sys.stderr)
+            sys.exit(1 if failed else 0)
 
+        # Validate manifest
+        with args.input as f, stats.stage('parse'):
+            manifest = new_schema(ioutils.load(f))
+        manifest.validate(workers=args.workers)
         sys.exit(0)
     except Exception:
         print("panic: failed to generate manifest", file=sys.stderr)
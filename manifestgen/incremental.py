@@ -0,0 +1,233 @@
+# MIT License
+#
+# (C) Copyright [2026] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+""" Incremental generation, only regenerating the releases whose inputs
+changed since a previous run.
+
+Each release is generated from its release in the manifest, and from the
+customizations under `spec.kubernetes.services.<name>`, which may reference
+other customizations through templates. Those customization paths are found
+by following the references of every template under the chart's
+customizations, then the references of templates under every path they
+reference, and so on. A digest of the release and of the unrendered value at
+each of those paths is recorded per release. A later run with the same
+digests copies the release from the previous output instead of merging and
+validating it again.
+"""
+import hashlib
+import io
+
+from manifestgen import ioutils, stats
+from manifestgen.cache import environment_digest
+from manifestgen.customizations import Customizations, index_templates, resolve, template_refs
+from manifestgen.schema import new_schema
+
+_MISSING = object()
+
+
+def _digest(value):
+    """ Digest of a value loaded from yaml """
+    if value is _MISSING:
+        return 'missing'
+    return hashlib.sha256(repr(value).encode('utf-8')).hexdigest()
+
+
+def _get(obj, path):
+    """ Get the value at path (a key tuple), _MISSING if there is none """
+    for key in path:
+        if isinstance(obj, dict):
+            obj = obj.get(key, _MISSING)
+        elif isinstance(obj, list) and isinstance(key, int) and -len(obj) <= key < len(obj):
+            obj = obj[key]
+        else:
+            return _MISSING
+        if obj is _MISSING:
+            return _MISSING
+    return obj
+
+
+class Dependencies:
+    """ The customization paths releases are generated from, in an unrendered
+    customizations spec.
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.charts = tuple(Customizations.CHARTS_REF.split('.')[1:])
+        self._direct = {}
+        self._digests = {}
+
+    def _value_path(self, ref):
+        """ The path holding the value a template reference reads. That is the
+        nearest parent of the reference that exists and is a mapping, since
+        the parent may be a template rendering to a mapping, or the reference
+        may not be a key at all.
+        """
+        obj = self.spec
+        for i, key in enumerate(ref):
+            if not isinstance(obj, dict) or key not in obj:
+                return ref[:i] or ref
+            obj = obj[key]
+        return ref
+
+    def direct(self, path):
+        """ The paths read by the templates in the value at path """
+        deps = self._direct.get(path)
+        if deps is None:
+            value = _get(self.spec, path)
+            refs = set()
+            if value is not _MISSING:
+                for source in index_templates(value, path).values():
+                    refs.update(template_refs(source))
+            deps = self._direct[path] = frozenset(self._value_path(ref) for ref in refs)
+        return deps
+
+    def release(self, name):
+        """ The customization paths the release `name` is generated from """
+        root = self.charts + (name,)
+        found = {root}
+        pending = [root]
+        while pending:
+            for dep in self.direct(pending.pop()):
+                if dep not in found:
+                    found.add(dep)
+                    pending.append(dep)
+        return found
+
+    def digest(self, path):
+        """ Digest of the unrendered value at path """
+        digest = self._digests.get(path)
+        if digest is None:
+            digest = self._digests[path] = _digest(_get(self.spec, path))
+        return digest
+
+
+def _occurrences(names):
+    """ (name, n) for the n-th release of each name, to match releases across runs """
+    seen = {}
+    keys = []
+    for name in names:
+        keys.append((name, seen.get(name, 0)))
+        seen[name] = seen.get(name, 0) + 1
+    return keys
+
+
+def _reusable(manifest, records, previous, previous_deps):
+    """ Map the indices of the releases that are unchanged since the previous
+    run to their release in the previous output.
+    """
+    # pylint: disable=too-many-locals
+    if not previous or not previous_deps or \
+            previous_deps.get('environment') != environment_digest():
+        return {}
+    previous_manifest = new_schema(ioutils.load(previous))
+    previous_releases = previous_manifest.get(previous_manifest.CHARTS_REF) or []
+    previous_records = previous_deps.get('releases', [])
+    if len(previous_releases) != len(previous_records):
+        return {}
+    by_key = dict(zip(_occurrences(record['name'] for record in previous_records),
+                      zip(previous_records, previous_releases)))
+
+    reuse = {}
+    keys = _occurrences(record['name'] for record in records)
+    for idx, (key, record) in enumerate(zip(keys, records)):
+        found = by_key.get(key)
+        if found is None:
+            continue
+        previous_record, previous_release = found
+        if previous_record['input'] == record['input'] and \
+                previous_record['deps'] == record['deps'] and \
+                manifest.release_name(previous_release) == record['name']:
+            reuse[idx] = previous_release
+    return reuse
+
+
+def _prune(spec, charts, keep):
+    """ Shallow copy of spec with only the customizations of charts in keep """
+    spec = dict(spec)
+    node = spec
+    for key in charts[:-1]:
+        if not isinstance(node.get(key), dict):
+            return spec
+        node[key] = dict(node[key])
+        node = node[key]
+    if isinstance(node.get(charts[-1]), dict):
+        node[charts[-1]] = {name: value for name, value in node[charts[-1]].items()
+                            if name in keep}
+    return spec
+
+
+def generate(manifest_text, customizations_text=None, previous=None, previous_deps=None, *,
+             full_validation=False, workers=None):
+    """ Generate a manifest given as yaml text with the customizations yaml
+    text. Given the output of a previous run as `previous`, and the
+    dependencies it returned as `previous_deps`, releases generated from the
+    same inputs are copied from the previous output. Only the other releases
+    are merged and validated, and only the customizations they need are
+    rendered.
+
+    Returns the output yaml text, and the dependencies to pass to the next run.
+    """
+    # pylint: disable=too-many-arguments, too-many-locals
+    obj = None
+    if customizations_text is not None:
+        obj = Customizations.parse(io.StringIO(customizations_text))
+    deps = Dependencies(obj['spec'] if obj else {})
+    with stats.stage('parse'):
+        manifest = new_schema(ioutils.load(manifest_text))
+
+    releases = list(manifest.get(manifest.CHARTS_REF) or [])
+    records = []
+    for release in releases:
+        name = manifest.release_name(release)
+        paths = sorted(deps.release(name), key=repr)
+        records.append({'name': name, 'input': _digest(release),
+                        'deps': [[list(path), deps.digest(path)] for path in paths]})
+    reuse = _reusable(manifest, records, previous, previous_deps)
+    affected = [idx for idx in range(len(releases)) if idx not in reuse]
+    stats.count('releases_reused', len(reuse))
+
+    customizations = None
+    if obj is not None:
+        if reuse:
+            # The affected releases' charts, and any chart they reference
+            keep = {records[idx]['name'] for idx in affected}
+            n = len(deps.charts)
+            keep.update(path[n] for idx in affected for path, _ in records[idx]['deps']
+                        if len(path) > n and tuple(path[:n]) == deps.charts)
+            obj['spec'] = _prune(obj['spec'], deps.charts, keep)
+        with stats.stage('render'):
+            resolve(obj['spec'])
+        customizations = Customizations(obj)
+        customizations.validate()
+
+    manifest.validate(None if full_validation else affected, workers)
+    if reuse:
+        for idx, release in reuse.items():
+            releases[idx] = release
+        manifest.set(manifest.CHARTS_REF, releases)
+    with stats.stage('merge'):
+        for idx in affected:
+            values = customizations.get_chart(records[idx]['name']) if customizations else None
+            if values:
+                manifest.update_release(idx, manifest.RELEASE_VALUES_REF, values, update=True)
+    manifest.validate(None if full_validation else affected, workers)
+    return manifest.dump(), {'environment': environment_digest(), 'releases': records}
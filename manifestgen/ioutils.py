@@ -20,16 +20,333 @@
 # ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
 # OTHER DEALINGS IN THE SOFTWARE.
 """ I/O utilities """
+# pylint: disable=global-statement,invalid-name
+import os
+import re
+import sys
 
 import yaml
+from yaml.constructor import ConstructorError
+from yaml.emitter import ScalarAnalysis
+from yaml.events import (AliasEvent, MappingEndEvent, MappingStartEvent, ScalarEvent,
+                         SequenceEndEvent, SequenceStartEvent, StreamEndEvent)
+from yaml.nodes import ScalarNode
+
+from manifestgen import stats
+
+# Backends: libyaml based or pure python
+C_BACKEND = 'c'
+PYTHON_BACKEND = 'python'
+
+# Line breaks as str.splitlines sees them
+_LINE_BREAK_RE = re.compile('[\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029]')
+
+
+def is_multiline(data):
+    """ Whether a string has more than one line, like
+    len(data.splitlines()) > 1 without copying every line """
+    newline = data.find('\n')
+    if newline == -1:
+        # Without line breaks, data itself is the only line
+        return len(data.splitlines()) > 1
+    if newline < len(data) - 1:
+        return True
+    # Only a trailing newline, look for other line breaks before it
+    end = len(data) - 2 if data.endswith('\r\n') else len(data) - 1
+    return _LINE_BREAK_RE.search(data, 0, end) is not None
+
 
 def str_presenter(dumper, data):
     "Use the | scalar syntax for yaml"
-    if len(data.splitlines()) > 1:  # check for multiline string
+    if is_multiline(data):
         return dumper.represent_scalar('tag:yaml.org,2002:str', data, style='|')
     return dumper.represent_scalar('tag:yaml.org,2002:str', data)
 
 yaml.add_representer(str, str_presenter)
 
-load = yaml.safe_load
-dump = yaml.safe_dump
+
+# Scalars at least this long are analyzed and written with regular
+# expressions by PySafeDumper instead of character by character
+_LONG_SCALAR = 256
+
+# Characters of yaml.emitter.Emitter.analyze_scalar
+_BREAKS = '\n\x85\u2028\u2029'
+_SPACES = '\0 \t\r' + _BREAKS
+_BREAKS_RE = re.compile(f'[{_BREAKS}]+')
+_INNER_FLOW_RE = re.compile(r'[,?\[\]{}:]')
+_INNER_BLOCK_RE = re.compile(f':(?:[{_SPACES}]|\\Z)')
+_COMMENT_RE = re.compile(f'[{_SPACES}]#')
+_BREAK_SPACE_RE = re.compile(f'[{_BREAKS}] ')
+_SPACE_BREAK_RE = re.compile(f' [{_BREAKS}]')
+_SPECIAL_RE = re.compile('[^\n\x20-\x7e]')
+_SPECIAL_UNICODE_RE = re.compile(
+    '[^\n\x20-\x7e\x85\xa0-\ud7ff\ue000-\ufefe\uff00-\ufffd\U00010000-\U0010fffe]')
+
+
+class PySafeDumper(yaml.SafeDumper):
+    """ Pure python safe dumper """
+    # pylint: disable=too-many-ancestors
+
+    def analyze_scalar(self, scalar):
+        """ Same as the base class, with regular expressions for long
+        scalars """
+        # pylint: disable=too-many-locals
+        if len(scalar) < _LONG_SCALAR:
+            return super().analyze_scalar(scalar)
+        first = scalar[0]
+        followed_by_space = scalar[1] in _SPACES
+        comment = _COMMENT_RE.search(scalar) is not None
+        indicators = (scalar.startswith(('---', '...')) or first in '#,[]{}&*!|>\'"%@`' or
+                      (first in '?:-' and followed_by_space) or comment)
+        flow_indicators = indicators or first in '?:' or \
+            _INNER_FLOW_RE.search(scalar, 1) is not None
+        block_indicators = indicators or _INNER_BLOCK_RE.search(scalar, 1) is not None
+        line_breaks = _BREAKS_RE.search(scalar) is not None
+        special = (_SPECIAL_UNICODE_RE if self.allow_unicode else _SPECIAL_RE).search(scalar)
+        edge_space = first in ' ' + _BREAKS or scalar[-1] in ' ' + _BREAKS
+        break_space = _BREAK_SPACE_RE.search(scalar) is not None
+        space_break = _SPACE_BREAK_RE.search(scalar) is not None or special is not None
+
+        plain = not (edge_space or break_space or space_break or line_breaks)
+        return ScalarAnalysis(scalar=scalar, empty=False, multiline=line_breaks,
+                              allow_flow_plain=plain and not flow_indicators,
+                              allow_block_plain=plain and not block_indicators,
+                              allow_single_quoted=not (break_space or space_break),
+                              allow_double_quoted=True,
+                              allow_block=not (scalar[-1] == ' ' or space_break))
+
+    def write_literal(self, text):
+        """ Same as the base class, writing long scalars a line at a time """
+        if len(text) < _LONG_SCALAR:
+            super().write_literal(text)
+            return
+        hints = self.determine_block_hints(text)
+        self.write_indicator('|' + hints, True)
+        if hints[-1:] == '+':
+            self.open_ended = True
+        self.write_line_break()
+        if text[0] not in _BREAKS:
+            self.write_indent()
+        position = 0
+        for breaks in _BREAKS_RE.finditer(text):
+            start, end = breaks.span()
+            if start > position:
+                self._write_text(text[position:start])
+            for line_break in breaks.group():
+                self.write_line_break(None if line_break == '\n' else line_break)
+            if end < len(text):
+                self.write_indent()
+            position = end
+        if position < len(text):
+            self._write_text(text[position:])
+            self.write_line_break()
+
+    def _write_text(self, data):
+        """ Write text as is """
+        if self.encoding:
+            data = data.encode(self.encoding)
+        self.stream.write(data)
+
+
+PySafeDumper.add_representer(str, str_presenter)
+
+# Only loading goes through libyaml: its emitter folds and escapes some
+# scalars differently, and the output must not depend on the backend
+CSafeLoader = yaml.CSafeLoader if yaml.__with_libyaml__ else None
+
+_loader = yaml.SafeLoader
+_compact = False
+
+_STR_TAG = 'tag:yaml.org,2002:str'
+_MAP_TAG = 'tag:yaml.org,2002:map'
+_SEQ_TAG = 'tag:yaml.org,2002:seq'
+_MERGE_TAG = 'tag:yaml.org,2002:merge'
+# Marks a mapping waiting for its next key, and a << merge key
+_NO_KEY = object()
+_MERGE = object()
+
+
+def set_backend(backend=None):
+    """ Select the yaml backend used by `load`: 'c' (libyaml) or 'python'.
+    None picks libyaml when it is available. `dump` always uses the python
+    emitter.
+    """
+    global _loader
+    if backend is None:
+        backend = C_BACKEND if yaml.__with_libyaml__ else PYTHON_BACKEND
+    if backend == C_BACKEND:
+        if not yaml.__with_libyaml__:
+            raise ValueError("The libyaml yaml backend is not available")
+        _loader = CSafeLoader
+    elif backend == PYTHON_BACKEND:
+        _loader = yaml.SafeLoader
+    else:
+        raise ValueError(f"Unknown yaml backend: {backend}")
+
+
+def get_backend():
+    """ Get the name of the yaml backend in use """
+    return C_BACKEND if _loader is CSafeLoader else PYTHON_BACKEND
+
+
+def set_compact(enabled=True):
+    """ Select compact loading for `load` and `load_all`: documents are
+    constructed straight from parser events instead of first composing a
+    graph of nodes for the whole document, and strings (keys included) are
+    interned so repeats share one object. Tags other than !!map and !!seq on
+    mappings and sequences are not supported.
+    """
+    global _compact
+    _compact = enabled
+
+
+def get_compact():
+    """ Get whether compact loading is in use """
+    return _compact
+
+
+def _merge(mapping, merges, mark):
+    """ Apply the << merge keys of a mapping, explicit keys win """
+    explicit = dict(mapping)
+    mapping.clear()
+    for value in merges:
+        for merged in reversed(value) if isinstance(value, list) else [value]:
+            if not isinstance(merged, dict):
+                raise ConstructorError("while constructing a mapping", mark,
+                                       "expected a mapping or list of mappings for merging",
+                                       mark)
+            mapping.update(merged)
+    mapping.update(explicit)
+
+
+def _add(top, value, mark):
+    """ Add a value to the innermost open collection of `_construct` """
+    # pylint: disable=unidiomatic-typecheck
+    if type(top[0]) is list:
+        top[0].append(value)
+    elif top[1] is _NO_KEY:
+        top[1] = value
+        top[4] = mark
+    elif top[1] is _MERGE:
+        top[2] = (top[2] or []) + [value]
+        top[1] = _NO_KEY
+    else:
+        try:
+            top[0][top[1]] = value
+        except TypeError as e:
+            raise ConstructorError("while constructing a mapping", top[3],
+                                   "found unhashable key", top[4]) from e
+        top[1] = _NO_KEY
+
+
+def _construct(loader):
+    """ Construct the next document of a loader from its events """
+    # pylint: disable=too-many-branches
+    constructors = loader.yaml_constructors
+    anchors = {}
+    # Open collections: [mapping or sequence, key or _NO_KEY, merges, mark,
+    # key mark]
+    stack = []
+    root = None
+    loader.get_event()
+    while True:
+        event = loader.get_event()
+        kind = type(event)
+        if kind is ScalarEvent:
+            tag = event.tag
+            if tag is None or tag == '!':
+                tag = loader.resolve(ScalarNode, event.value, event.implicit)
+            if tag == _STR_TAG:
+                value = sys.intern(event.value)
+            elif tag == _MERGE_TAG and stack and isinstance(stack[-1][0], dict) and \
+                    stack[-1][1] is _NO_KEY:
+                # Only merge keys are merges, elsewhere << is an error as usual
+                value = _MERGE
+            else:
+                node = ScalarNode(tag, event.value, event.start_mark, event.end_mark,
+                                  event.style)
+                value = constructors.get(tag, constructors[None])(loader, node)
+        elif kind is MappingStartEvent or kind is SequenceStartEvent:
+            if event.tag not in (None, '!', _MAP_TAG, _SEQ_TAG):
+                raise ConstructorError(None, None,
+                                       f"compact loading does not support the {event.tag} tag",
+                                       event.start_mark)
+            value = {} if kind is MappingStartEvent else []
+            if event.anchor is not None:
+                anchors[event.anchor] = value
+            stack.append([value, _NO_KEY, None, event.start_mark, None])
+            continue
+        elif kind is AliasEvent:
+            if event.anchor not in anchors:
+                raise yaml.composer.ComposerError(None, None,
+                                                  f"found undefined alias {event.anchor!r}",
+                                                  event.start_mark)
+            value = anchors[event.anchor]
+        elif kind is MappingEndEvent or kind is SequenceEndEvent:
+            value, _, merges, mark, _ = stack.pop()
+            if merges:
+                _merge(value, merges, mark)
+        else:
+            return root
+        if kind is ScalarEvent and event.anchor is not None:
+            anchors[event.anchor] = value
+        if stack:
+            _add(stack[-1], value, event.start_mark)
+        else:
+            root = value
+
+
+def _compact_load_all(stream):
+    """ Load every document of a stream with `_construct` """
+    loader = _loader(stream)
+    try:
+        loader.get_event()
+        while not loader.check_event(StreamEndEvent):
+            yield _construct(loader)
+    finally:
+        loader.dispose()
+
+
+def load(stream):
+    """ Load a yaml document """
+    if not _compact:
+        return yaml.load(stream, Loader=_loader)
+    loader = _loader(stream)
+    try:
+        loader.get_event()
+        data = None
+        if not loader.check_event(StreamEndEvent):
+            start = loader.peek_event().start_mark
+            data = _construct(loader)
+            if not loader.check_event(StreamEndEvent):
+                raise yaml.composer.ComposerError("expected a single document in the stream",
+                                                  start, "but found another document",
+                                                  loader.peek_event().start_mark)
+        return data
+    finally:
+        loader.dispose()
+
+
+def load_all(stream):
+    """ Load every document of a yaml stream, one at a time. Documents are
+    only read from the stream when the previous one has been used.
+    """
+    if _compact:
+        return _compact_load_all(stream)
+    return yaml.load_all(stream, Loader=_loader)
+
+
+def parse(stream):
+    """ Parse a yaml stream into events, without composing or constructing
+    anything """
+    return yaml.parse(stream, Loader=_loader)
+
+
+def dump(data, stream=None, **kwds):
+    """ Dump data as a yaml document """
+    with stats.stage('dump'):
+        return yaml.dump_all([data], stream, Dumper=PySafeDumper, **kwds)
+
+
+set_backend(os.environ.get('MANIFESTGEN_YAML_BACKEND') or None)
+set_compact(os.environ.get('MANIFESTGEN_YAML_COMPACT', '') not in ('', '0'))
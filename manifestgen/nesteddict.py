@@ -21,8 +21,11 @@
 # OTHER DEALINGS IN THE SOFTWARE.
 """ Nested Dict class """
 
+import functools
 from collections.abc import Mapping
-from copy import deepcopy
+from copy import copy, deepcopy
+
+from manifestgen import stats
 
 
 def deepupdate(self, other, shallow=False):
@@ -42,11 +45,69 @@ def deepupdate(self, other, shallow=False):
         self_k = self.get(k)
         if isinstance(self_k, Mapping) and isinstance(v, Mapping):
             deepupdate(self_k, v)
+        elif shallow:
+            self[k] = v
         else:
-            self[k] = v if shallow else deepcopy(v)
+            stats.count('deep_copies')
+            self[k] = deepcopy(v)
     return self
 
 
+def merge(base, other):
+    """Copy-on-write version of `deepupdate`, returns a copy of `base`
+    recursively updated with items from `other`.
+
+    Only the mappings on updated paths are copied, all other values are
+    shared with `base` and `other`. Neither of them is modified.
+    """
+    # pylint: disable=invalid-name
+    stats.count('shallow_copies')
+    merged = copy(base)
+    for k, v in other.items():
+        # Cases: (merged[k], v) is
+        #   * (Mapping, Mapping) -> merged[k] = merge(merged[k], v)
+        #   * otherwise -> merged[k] = v
+        merged_k = merged[k] if k in merged else None
+        if isinstance(merged_k, Mapping) and isinstance(v, Mapping):
+            merged[k] = merge(merged_k, v)
+        else:
+            merged[k] = v
+    return merged
+
+
+@functools.lru_cache(maxsize=4096)
+def split_key(key):
+    """ Split a period separated key into a tuple of keys """
+    return tuple(key.split('.'))
+
+
+def deep_get(obj, keys, default=None):
+    """ Get the value at the tuple of `keys` in nested dicts, without copying
+    anything. Missing keys, non dict parents and None values give `default`.
+    """
+    found = obj
+    # pylint: disable=invalid-name
+    for k in keys:
+        if not isinstance(found, dict):
+            return default
+        found = dict.get(found, k)
+        if found is None:
+            return default
+    return found
+
+
+@functools.lru_cache(maxsize=None)
+def getter(key):
+    """ Compile a period separated key into a `getter(obj, default=None)`
+    function doing a deep get of that key.
+    """
+    keys = split_key(key)
+
+    def get(obj, default=None):
+        return deep_get(obj, keys, default)
+    return get
+
+
 class NestedDict(dict):
     """dict object that allows for period separated gets:
     a_config.get('some.key', default) ==
@@ -67,33 +128,29 @@ class NestedDict(dict):
         """ Deep set a value. \n
         Ex: `d.set_deep('a.b.c', 'foo')` is the same as: \n
         `d.setdefault('a', {}).setdefault('b', {})['c'] = 'foo'`
+
+        Mappings along the path are copied rather than modified, and `value`
+        is stored without copying it (see `merge` for `update`). So neither
+        `value` nor anything shared with other objects is ever modified.
         """
         setter = self
-        keys = key.split('.')
-        last = keys.pop()
+        *keys, last = split_key(key)
         # pylint: disable=invalid-name
         for k in keys:
-            setter = setter.setdefault(k, {})
+            child = setter[k] if k in setter else {}
+            if not isinstance(child, dict):
+                raise TypeError(f"Can not set {key}, {k} is not a dict")
+            stats.count('shallow_copies')
+            setter[k] = copy(child)
+            setter = setter[k]
         if update and last in setter:
-            deepupdate(setter[last], value)
+            setter[last] = merge(setter[last], value)
         else:
-            setter[last] = deepcopy(value)
+            setter[last] = value
 
     def get(self, key, default=None):
         """ Deep get a value. \n
         E: `d.get('a.b.c', 'bar')` is the same as: \n
         `d.get('a', {}).get('b', {}).get('c', 'bar')`
         """
-        keys = key.split('.')
-        found = {}
-
-        # pylint: disable=invalid-name
-        for k, v in self.items():
-            found[k] = v
-        for k in keys:
-            if not isinstance(found, dict):
-                return default
-            found = found.get(k)
-            if found is None:
-                return default
-        return found
+        return deep_get(self, split_key(key), default)
@@ -0,0 +1,242 @@
+# MIT License
+#
+# (C) Copyright [2026] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+""" Generation passing releases without customizations through verbatim
+
+The manifest is only parsed into yaml events to find where each release is
+in the source text, and what it is named. Releases without customizations
+are swapped for placeholders in the text before loading it, so only the rest
+of the manifest and the customized releases are loaded, merged, validated and
+dumped. The source text of the other releases is then put back in place of
+their placeholders, keeping its formatting.
+"""
+import re
+import secrets
+
+import yaml
+
+from manifestgen import ioutils, stats
+from manifestgen.schema import Manifest, ManifestV1Beta1, SchemaV2, new_schema
+
+# yaml line breaks
+_BREAK_RE = re.compile('\r\n|[\r\n\x85\u2028\u2029]')
+
+_resolver = yaml.resolver.Resolver()
+
+_STR_TAG = 'tag:yaml.org,2002:str'
+
+
+class _Release:
+    """ Where a release is in the source text, and its name """
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, path, name_path, start):
+        self.path = path
+        self.name_path = path + name_path
+        self.name = None
+        self.start = start
+        self.end = None
+
+
+class _Frame:
+    """ A mapping or sequence being parsed """
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, path, event):
+        # Key path of the collection, None under complex mapping keys
+        self.path = path
+        self.event = event
+        self.mapping = isinstance(event, yaml.MappingStartEvent)
+        self.key = None
+        self.expect_key = True
+        self.index = 0
+        self.release = None
+
+    def child_path(self):
+        """ Path of the next child node, also moving on to the one after """
+        if self.mapping:
+            self.expect_key = True
+            key = self.key
+        else:
+            key = self.index
+            self.index += 1
+        return None if self.path is None else self.path + (key,)
+
+
+_UNKNOWN = object()
+
+
+def _scalar(event):
+    """ Python value of a scalar event, _UNKNOWN for explicitly tagged ones """
+    if event.tag is None and event.implicit[0]:
+        if _resolver.resolve(yaml.ScalarNode, event.value, (True, False)) == _STR_TAG:
+            return event.value
+        return ioutils.load(event.value)
+    if event.tag in (None, '!', _STR_TAG):
+        return event.value
+    return _UNKNOWN
+
+
+def scan(manifest_text, refs):
+    """ Find the releases of a manifest without loading it. `refs` maps the
+    period separated path of every possible releases list to the path of the
+    release names in it.
+
+    Returns the top level scalars, and the block style releases found in
+    block style lists at each path of `refs`. Returns None when the manifest
+    has anchors or aliases, since then releases can not be copied around.
+    """
+    refs = {tuple(key.split('.')): tuple(name.split('.')) for key, name in refs.items()}
+    top = {}
+    found = {key: [] for key in refs}
+    stack = []
+    current = None
+    for event in ioutils.parse(manifest_text):
+        if isinstance(event, yaml.AliasEvent) or getattr(event, 'anchor', None) is not None:
+            return None
+        if isinstance(event, yaml.CollectionEndEvent):
+            frame = stack.pop()
+            if frame.release is not None:
+                frame.release.end = event.end_mark
+                current = None
+            continue
+        if not isinstance(event, yaml.NodeEvent):
+            continue
+
+        parent = stack[-1] if stack else None
+        if parent is not None and parent.mapping and parent.expect_key:
+            parent.expect_key = False
+            if isinstance(event, yaml.ScalarEvent):
+                parent.key = event.value
+            else:
+                stack.append(_Frame(None, event))
+            continue
+        path = parent.child_path() if parent is not None else ()
+
+        if isinstance(event, yaml.ScalarEvent):
+            if current is not None and path == current.name_path:
+                current.name = _scalar(event)
+            elif path is not None and len(path) == 1:
+                top[path[0]] = event.value
+            continue
+        frame = _Frame(path, event)
+        if path and path[:-1] in refs and isinstance(event, yaml.MappingStartEvent) and \
+                not event.flow_style and not parent.event.flow_style:
+            frame.release = current = _Release(path, refs[path[:-1]], event.start_mark)
+            found[path[:-1]].append(current)
+        stack.append(frame)
+    return top, {'.'.join(key): releases for key, releases in found.items()}
+
+
+def _offsets(text):
+    """ Offsets of the start of every line of text """
+    return [0] + [match.end() for match in _BREAK_RE.finditer(text)]
+
+
+def _reindent(lines, delta):
+    """ Shift the lines after the first by delta columns """
+    shifted = [lines[0]]
+    for line in lines[1:]:
+        if delta >= 0:
+            shifted.append(' ' * delta + line if line else line)
+        else:
+            spaces = len(line) - len(line.lstrip(' '))
+            shifted.append(line[min(spaces, -delta):])
+    return shifted
+
+
+def _passed(releases, customizations):
+    """ Get the releases without customizations """
+    for release in releases:
+        if release.name is None or release.name is _UNKNOWN or release.end is None:
+            continue
+        if release.end.line == release.start.line:
+            continue
+        if customizations is not None and customizations.get_chart(release.name):
+            continue
+        yield release
+
+
+def _cut(manifest_text, customizations, token):
+    """ Cut the releases without customizations out of manifest_text, leaving
+    placeholders. Returns the remaining text, and the source lines and column
+    of each release cut.
+    """
+    refs = {cls.CHARTS_REF: cls.RELEASE_NAME_REF
+            for cls in (Manifest, ManifestV1Beta1, SchemaV2)}
+    scanned = scan(manifest_text, refs)
+    if scanned is None:
+        return manifest_text, []
+    top, found = scanned
+    offsets = _offsets(manifest_text)
+    pieces, sources, position = [], [], 0
+    for release in _passed(found[new_schema(top).CHARTS_REF], customizations):
+        start = offsets[release.start.line] + release.start.column
+        end = offsets[release.end.line] + release.end.column
+        # Keep the indentation of whatever follows the release
+        gap = manifest_text[offsets[release.end.line]:end]
+        if gap.strip():
+            continue
+        pieces += [manifest_text[position:start],
+                   f'manifestgen-passthrough-{token}-{len(sources)}\n', gap]
+        sources.append((_BREAK_RE.split(manifest_text[start:end].rstrip()),
+                        release.start.column))
+        position = end
+    pieces.append(manifest_text[position:])
+    return ''.join(pieces), sources
+
+
+def generate(manifest_text, customizations=None, *, workers=None):
+    """ Generate a manifest given as yaml text with customizations, returning
+    the output yaml text. Releases without customizations are copied from
+    manifest_text verbatim, and are not validated. See `Manifest.validate`
+    for `workers`.
+    """
+    token = secrets.token_hex(8)
+    with stats.stage('parse'):
+        remaining, sources = _cut(manifest_text, customizations, token)
+        manifest = new_schema(ioutils.load(remaining))
+    stats.count('releases_passed_through', len(sources))
+
+    placeholder = re.compile(f'manifestgen-passthrough-{token}-[0-9]+')
+    releases = manifest.get(manifest.CHARTS_REF) or []
+    kept = [idx for idx, release in enumerate(releases)
+            if not (isinstance(release, str) and placeholder.fullmatch(release))]
+    manifest.validate(kept, workers)
+
+    changed = set()
+    with stats.stage('merge'):
+        if customizations:
+            for idx in kept:
+                values = customizations.get_chart(manifest.release_name(releases[idx]))
+                if values:
+                    manifest.update_release(idx, manifest.RELEASE_VALUES_REF, values,
+                                            update=True)
+                    changed.add(idx)
+    manifest.validate(sorted(changed), workers)
+
+    def restore(match):
+        lines, column = sources[int(match.group(2))]
+        return match.group(1) + '\n'.join(_reindent(lines, len(match.group(1)) - column))
+
+    output = manifest.dump()
+    return re.sub(f'^((?: *- )+)manifestgen-passthrough-{token}-([0-9]+)$', restore, output,
+                  flags=re.MULTILINE)
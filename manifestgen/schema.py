@@ -22,7 +22,9 @@
 """ Various Schema objects """
 # pylint: disable=invalid-name,no-else-raise,no-else-return,unnecessary-pass
 
-from manifestgen import ioutils, nesteddict, validator
+from copy import deepcopy
+
+from manifestgen import ioutils, nesteddict, stats, validator
 
 
 class BaseSchema:
@@ -52,7 +54,8 @@ class BaseSchema:
 
     def validate(self):
         """ Validate manifest data """
-        validator.validate(self.dump())
+        with stats.stage('validate'):
+            validator.validate(self._dict())
 
     def data(self):
         """ Get data """
@@ -82,9 +85,67 @@ class Manifest(BaseSchema):
     RELEASE_NAME_REF = 'metadata.name'
     RELEASE_VALUES_REF = 'spec.chart.values'
 
+    # Release name -> indices in the releases list, built on first use
+    _release_index = None
+    # Whether the releases list is our own copy, and can be updated in place
+    _releases_owned = False
+
     def _dict(self):
         return dict(self._data)
 
+    def set(self, key, value):
+        """ Setter for the internal data """
+        super().set(key, value)
+        self._release_index = None
+        self._releases_owned = False
+
+    def validate(self, releases=None, workers=None):
+        """ Validate manifest data. Given a list of release indices, only
+        those releases are validated along with the rest of the manifest.
+        With more than one of `workers`, releases are validated in parallel.
+        """
+        with stats.stage('validate'):
+            validator.validate(self._dict(), self.CHARTS_REF, releases, workers)
+
+    def release_name(self, release):
+        """ Get the name of a release """
+        return nesteddict.getter(self.RELEASE_NAME_REF)(release)
+
+    def release_index(self):
+        """ Get a dict of release names to their indices in the releases list """
+        if self._release_index is None:
+            index = {}
+            for idx, release in enumerate(self.get(self.CHARTS_REF, [])):
+                index.setdefault(self.release_name(release), []).append(idx)
+            self._release_index = index
+        return self._release_index
+
+    def get_release(self, name, default=None):
+        """ Get the (first) release with the given name """
+        indices = self.release_index().get(name)
+        if not indices:
+            return default
+        return nesteddict.NestedDict(self.get(self.CHARTS_REF)[indices[0]])
+
+    def update_release(self, idx, key, value, update=False):
+        """ Deep set a value in the release at index `idx`, see
+        `NestedDict.set_deep`. Only that release is copied, the first update
+        also copies the releases list itself (but none of the releases).
+        `value` is copied too, so releases never share it: yaml would dump
+        shared values as anchors and aliases.
+        """
+        stats.count('releases_merged')
+        if not self._releases_owned:
+            self._data.set_deep(self.CHARTS_REF, list(self.get(self.CHARTS_REF)))
+            self._releases_owned = True
+        releases = self.get(self.CHARTS_REF)
+        release = nesteddict.NestedDict(releases[idx])
+        stats.count('deep_copies')
+        release.set_deep(key, deepcopy(value), update)
+        releases[idx] = dict(release)
+        if key == self.RELEASE_NAME_REF or self.RELEASE_NAME_REF.startswith(f'{key}.'):
+            self._release_index = None
+
     def get_releases(self):
         """ Get current manifest charts """
         return [nesteddict.NestedDict(i) for i in self.get(self.CHARTS_REF, [])]
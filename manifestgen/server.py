@@ -0,0 +1,163 @@
+# MIT License
+#
+# (C) Copyright [2026] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+""" Long running manifestgen server, answering requests on a Unix socket
+
+Every request and response is one line of JSON. Requests are objects with a
+`command` and its arguments:
+
+    {"command": "generate", "manifest": "<yaml>", "customizations": "<path>",
+     "values_path": "<path>", "full_validation": false}
+    {"command": "validate", "manifest": "<yaml>"}
+
+and are answered with `{"ok": true, "output": "<yaml>"}` (no output when
+validating) or `{"ok": false, "error": "<message>"}`. Compiled schemas and
+templates, and loaded customizations, are kept across requests.
+Customizations are loaded again once their file changes.
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import traceback
+
+from manifestgen import ioutils
+from manifestgen.customizations import Customizations
+from manifestgen.generate import manifestgen
+from manifestgen.schema import new_schema
+
+
+class CustomizationsStore:
+    """ Loaded and validated customizations by file path """
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = {}
+
+    def get(self, path):
+        """ Get the customizations in the file at path, loading them again
+        when the file changed since they were last loaded.
+        """
+        path = os.path.realpath(path)
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_ctime_ns, st.st_size, st.st_ino)
+        with self._lock:
+            loaded = self._loaded.get(path)
+        if loaded is not None and loaded[0] == stamp:
+            return loaded[1]
+        # Several threads may load the same file at once, any of them is fine
+        with open(path, encoding='utf-8') as f:
+            customizations = Customizations.load(f)
+        customizations.validate()
+        with self._lock:
+            self._loaded[path] = (stamp, customizations)
+        return customizations
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """ Answers each line of JSON sent over a connection """
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                response = self.server.answer(json.loads(line))
+            except Exception as e:  # pylint: disable=broad-except
+                traceback.print_exc(file=sys.stderr)
+                response = {'ok': False, 'error': f'{type(e).__name__}: {e}'}
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+
+class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """ Threaded server answering generate and validate requests """
+    daemon_threads = True
+
+    def __init__(self, path, workers=None):
+        super().__init__(path, RequestHandler)
+        self.workers = workers
+        self.customizations = CustomizationsStore()
+
+    def answer(self, message):
+        """ Get the response to a request message """
+        command = message.get('command')
+        if command not in ('generate', 'validate'):
+            raise ValueError(f"Unknown command: {command}")
+        manifest = new_schema(ioutils.load(message['manifest']))
+        manifest.validate(workers=self.workers)
+        if command == 'validate':
+            return {'ok': True}
+        customizations = None
+        if message.get('customizations'):
+            customizations = self.customizations.get(message['customizations'])
+        manifestgen(manifest, customizations, message.get('values_path'),
+                    message.get('full_validation', False), self.workers)
+        return {'ok': True, 'output': manifest.dump()}
+
+
+def _remove_stale_socket(path):
+    """ Remove a socket file left behind by a server that is gone """
+    if not os.path.exists(path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        try:
+            s.connect(path)
+        except ConnectionRefusedError:
+            os.remove(path)
+        else:
+            raise OSError(f"A server is already listening on {path}")
+
+
+def request(path, command, **kwds):
+    """ Send one request to the server listening on path, return the response """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.connect(path)
+        with s.makefile('rwb') as f:
+            f.write(json.dumps(dict(kwds, command=command)).encode('utf-8') + b'\n')
+            f.flush()
+            return json.loads(f.readline())
+
+
+def main(argv=None): # pragma: NO COVER
+    """ Entrypoint of `manifestgen serve` """
+    parser = argparse.ArgumentParser(prog='manifestgen serve',
+                                     description='Answer manifestgen requests on a Unix socket.')
+    parser.add_argument('--socket', metavar='PATH', required=True, help='Unix socket to listen on')
+    parser.add_argument('--workers', metavar='N', type=int, default=1,
+                        help='Number of processes to validate releases with.')
+    args = parser.parse_args(argv)
+
+    _remove_stale_socket(args.socket)
+    # Stop cleanly, removing the socket, when terminated
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    with Server(args.socket, args.workers) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.remove(args.socket)
@@ -0,0 +1,128 @@
+# MIT License
+#
+# (C) Copyright [2026] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+""" Opt-in counters and per stage timings of a manifestgen run
+
+Nothing is recorded until `enable()` is called, hooks only check a flag
+otherwise. Stats are global to the process, runs in worker processes are
+not included.
+"""
+# pylint: disable=global-statement,invalid-name
+import contextlib
+import json
+import sys
+import time
+import tracemalloc
+from collections import Counter
+
+ENABLED = False
+
+COUNTERS = Counter()
+
+# Stage name -> {'calls', 'wall', 'cpu', 'peak_memory'}, in first run order.
+# peak_memory is None unless memory is tracked.
+STAGES = {}
+
+# [memory at stage start, peak memory of finished nested stages]
+_stack = []
+
+
+def enable(memory=False):
+    """ Start recording. With `memory`, tracemalloc is started to track the
+    peak memory of each stage. That makes everything several times slower,
+    and skews times between stages, so only use it to look at memory.
+    """
+    global ENABLED
+    reset()
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    ENABLED = True
+
+
+def disable():
+    """ Stop recording, keeping what was recorded so far """
+    global ENABLED
+    ENABLED = False
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def reset():
+    """ Forget everything recorded """
+    COUNTERS.clear()
+    STAGES.clear()
+    _stack.clear()
+
+
+def count(name, n=1):
+    """ Add n to counter `name` """
+    if ENABLED:
+        COUNTERS[name] += n
+
+
+@contextlib.contextmanager
+def stage(name):
+    """ Record the wall time, CPU time and peak memory (in bytes allocated
+    above what was allocated on entry) of the block as stage `name`. Stages
+    can be nested, a stage's times include the ones of stages it runs.
+    """
+    if not ENABLED:
+        yield
+        return
+    memory = tracemalloc.is_tracing()
+    if memory:
+        current, peak = tracemalloc.get_traced_memory()
+        if _stack:
+            _stack[-1][1] = max(_stack[-1][1], peak)
+        tracemalloc.reset_peak()
+        _stack.append([current, 0])
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield
+    finally:
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        record = STAGES.setdefault(name, {'calls': 0, 'wall': 0.0, 'cpu': 0.0,
+                                          'peak_memory': None})
+        record['calls'] += 1
+        record['wall'] += wall
+        record['cpu'] += cpu
+        if memory:
+            start, nested_peak = _stack.pop()
+            peak = max(nested_peak, tracemalloc.get_traced_memory()[1]) - start
+            record['peak_memory'] = max(record['peak_memory'] or 0, peak)
+
+
+def report():
+    """ Everything recorded, as JSON serializable data """
+    return {
+        'stages': {name: dict(record) for name, record in STAGES.items()},
+        'counters': dict(sorted(COUNTERS.items())),
+    }
+
+
+def write_report(path='-'):
+    """ Write the report as JSON to the file at path, or stderr for '-' """
+    text = json.dumps(report(), indent=2) + '\n'
+    if path == '-':
+        sys.stderr.write(text)
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
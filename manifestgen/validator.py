@@ -22,18 +22,22 @@
 """ Functions for validating manifest schemas """
 # pylint: disable=global-statement,invalid-name
 import os
-import tempfile
-
-import semver
-import yamale
-from yamale.validators import DefaultValidators, Validator
+import threading
+from itertools import repeat
 
+from manifestgen import ioutils, stats
 from manifestgen.nesteddict import NestedDict
 
 
 # Global Var
 SCHEMAS = NestedDict({})
 
+# Compiled yamale schemas by schema filename
+COMPILED_SCHEMAS = {}
+
+# Guards loading SCHEMAS and filling COMPILED_SCHEMAS from several threads
+_schemas_lock = threading.Lock()
+
 def _load_schemas():
     global SCHEMAS
     packge_dir_name = 'schemas'
@@ -58,14 +62,33 @@ def _load_schemas():
     SCHEMAS = NestedDict(schemas_dict[packge_dir_name])
 
 
+def schema_files():
+    """ Get the sorted filepaths of all schema versions """
+    if not SCHEMAS:
+        with _schemas_lock:
+            if not SCHEMAS:
+                _load_schemas()
+    files = []
+    pending = [SCHEMAS]
+    while pending:
+        for value in pending.pop().values():
+            if isinstance(value, dict):
+                pending.append(value)
+            else:
+                files.append(value)
+    return sorted(files)
+
+
 def _get_schema_filename(schema_ver):
     """ Attempt to get the filepath for a schema version """
     # Lazy load schema filepaths
 
     schema_key = schema_ver.replace("/", ".")
 
-    if not SCHEMAS.get(schema_key):
-        _load_schemas()
+    if not SCHEMAS:
+        with _schemas_lock:
+            if not SCHEMAS:
+                _load_schemas()
 
     filename = SCHEMAS.get(schema_key)
     if not filename:
@@ -74,50 +97,162 @@ def _get_schema_filename(schema_ver):
     return filename
 
 
-class Version(Validator):
-    """ Custom Semver v2 validator."""
-    tag = 'version'
-
-    def _is_valid(self, value):
-        # pylint: disable=broad-except
-        value = f"{value}"
-        try:
-            semver.VersionInfo.parse(value)
-        except Exception:  # pragma: NO COVER
-            return False
-        return True
-
-
-class SealedSecret(Validator):
-    """ Custom Semver v2 validator."""
-    tag = 'sealedSecret'
-
-    def _is_valid(self, value):
-        # pylint: disable=broad-except
-        try:
-            kind = value.get("kind", value.get("Kind"))
-            if kind not in "SealedSecret":
-                raise Exception("Could not find valid SealedSecret")
-        except Exception:  # pragma: NO COVER
-            return False
-        return True
-
-
-def validate(manifest_data):
-    """ Validate a manifest file against it's schema """
-    # pylint: disable=invalid-name
-    with tempfile.NamedTemporaryFile(suffix='.yaml', mode='w') as fp:
-        fp.write(manifest_data)
-        fp.seek(0)
-        data = yamale.make_data(fp.name)
-
-    validators = DefaultValidators.copy()  # This is a dictionary
-    validators[Version.tag] = Version
-    validators[SealedSecret.tag] = SealedSecret
-    schema_file = _get_schema_filename(data[0][0].get('schema', data[0][0].get('apiVersion', '')))
-    s = yamale.make_schema(schema_file, validators=validators)
+def __getattr__(name):
+    # The custom validators moved to `manifestgen.validators`, which is only
+    # imported once a schema is compiled since it pulls in yamale and semver
+    if name in ('Version', 'SealedSecret', 'VALIDATORS'):
+        from manifestgen import validators  # pylint: disable=import-outside-toplevel
+        return getattr(validators, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _compile_schema(schema_file):
+    """ Compile a schema file """
+    # pylint: disable=import-outside-toplevel
+    import yamale
+    from manifestgen.validators import VALIDATORS
+    return yamale.make_schema(schema_file, validators=VALIDATORS)
+
+
+def get_schema(schema_ver):
+    """ Get the compiled yamale schema for a schema version, compiling it at
+    most once per process.
+    """
+    schema_file = _get_schema_filename(schema_ver)
+    s = COMPILED_SCHEMAS.get(schema_file)
+    if s is None:
+        with _schemas_lock:
+            s = COMPILED_SCHEMAS.get(schema_file)
+            if s is None:
+                stats.count('schemas_compiled')
+                with stats.stage('compile_schema'):
+                    s = COMPILED_SCHEMAS[schema_file] = _compile_schema(schema_file)
+    return s
+
+
+class _Placeholder:
+    """ Stands in for the releases of a manifest while validating the rest """
+    # pylint: disable=too-few-public-methods
+
+    def __repr__(self):
+        return '<manifestgen:releases>'
+
+
+_PLACEHOLDER = _Placeholder()
+
+
+def _releases_validator(s, keys):
+    """ Get the validator for the releases list at `keys`, or None when its
+    items can not be validated independently of the rest of the manifest.
+    """
+    from yamale.validators import List  # pylint: disable=import-outside-toplevel
+    node = s._schema  # pylint: disable=protected-access
+    for key in keys:
+        if not isinstance(node, dict) or key not in node:
+            return None
+        node = node[key]
+    # Length constraints need the whole list
+    if not isinstance(node, List) or not node.validators or node.kwargs:
+        return None
+    return node
+
+
+def _release_errors(schema_ver, keys, releases):
+    """ Validate (index, release) pairs of the releases list at `keys`,
+    possibly in a worker process.
+    """
+    # pylint: disable=protected-access, import-outside-toplevel
+    from yamale.schema.datapath import DataPath
+    s = get_schema(schema_ver)
+    list_validator = _releases_validator(s, keys)
+    path = DataPath(*keys)
+    stats.count('releases_validated', len(releases))
+    errors = []
+    for idx, release in releases:
+        errors += s._validate_map_list(list_validator, {idx: release}, path, False)
+    return errors
+
+
+def _pool_release_errors(schema_ver, keys, pairs, workers):
+    """ `_release_errors` spread over a process pool, in the same order """
+    from concurrent.futures import ProcessPoolExecutor  # pylint: disable=import-outside-toplevel
+    # A few chunks per worker keeps the pool busy without paying the task
+    # overhead for every release
+    size = -(-len(pairs) // (workers * 4))
+    chunks = [pairs[i:i + size] for i in range(0, len(pairs), size)]
+    errors = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk_errors in pool.map(_release_errors, repeat(schema_ver), repeat(keys), chunks):
+            errors += chunk_errors
+    return errors
+
+
+def _validate_releases(schema_ver, data, keys, releases, workers=None):
+    """ Validate data, only checking the releases at the `releases` indices of
+    the list at `keys`. Errors are the same, and in the same order, as
+    validating a manifest that only has errors in those releases.
+
+    With more than one worker the releases are validated in a process pool.
+    """
+    s = get_schema(schema_ver)
+    items = data
+    for key in keys:
+        items = items.get(key) if isinstance(items, dict) else None
+    if _releases_validator(s, keys) is None or not isinstance(items, list) or not items:
+        return s.validate(data, None, False).errors
+
+    # Validate everything but the releases, then swap the errors reported for
+    # the placeholder with the ones of the selected releases.
+    header = dict(data)
+    node = header
+    for key in keys[:-1]:
+        node[key] = dict(node[key])
+        node = node[key]
+    node[keys[-1]] = [_PLACEHOLDER]
+    errors = s.validate(header, None, False).errors
+    marked = [i for i, error in enumerate(errors) if repr(_PLACEHOLDER) in error]
+    if not marked:
+        return s.validate(data, None, False).errors
+
+    if releases is None:
+        releases = range(len(items))
+    pairs = [(idx, items[idx]) for idx in releases]
+    if workers and workers > 1 and len(pairs) > 1:
+        release_errors = _pool_release_errors(schema_ver, keys, pairs, workers)
+    else:
+        release_errors = _release_errors(schema_ver, keys, pairs)
+    errors[marked[0]:marked[-1] + 1] = release_errors
+    return errors
+
+
+def validate(manifest_data, releases_ref=None, releases=None, workers=None):
+    """ Validate a manifest against it's schema. The manifest is given as
+    python data, or as a yaml string.
+
+    Given the dotted path of the releases list as `releases_ref`, and release
+    indices as `releases`, only those releases are validated along with the
+    rest of the manifest. With `releases_ref` and more than one of `workers`,
+    releases are validated in a process pool.
+    """
+    # pylint: disable=invalid-name, import-outside-toplevel
+    import yamale
+    from yamale.schema.validationresults import ValidationResult
+    stats.count('validations')
+    if isinstance(manifest_data, str):
+        manifest_data = ioutils.load(manifest_data)
+    data = [(manifest_data or {}, None)]
+
+    schema_ver = data[0][0].get('schema', data[0][0].get('apiVersion', ''))
+    s = get_schema(schema_ver)
+    parallel = workers is not None and workers > 1
     try:
-        yamale.validate(s, data, strict=False)
+        if releases_ref is None or (releases is None and not parallel):
+            yamale.validate(s, data, strict=False)
+        else:
+            errors = _validate_releases(schema_ver, data[0][0], releases_ref.split('.'),
+                                        releases, workers)
+            if errors:
+                raise yamale.YamaleError([ValidationResult(None, s.name, errors)])
     except ValueError as e:
         msg = "Error validating manifest: \n" + '\n'.join(str(e).split('\n')[2:])
         raise Exception(msg) from e
@@ -0,0 +1,58 @@
+# MIT License
+#
+# (C) Copyright [2026] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+""" Custom yamale validators used by the manifest schemas """
+import semver
+from yamale.validators import DefaultValidators, Validator
+
+
+class Version(Validator):
+    """ Custom Semver v2 validator."""
+    tag = 'version'
+
+    def _is_valid(self, value):
+        # pylint: disable=broad-except
+        value = f"{value}"
+        try:
+            semver.VersionInfo.parse(value)
+        except Exception:  # pragma: NO COVER
+            return False
+        return True
+
+
+class SealedSecret(Validator):
+    """ Custom Semver v2 validator."""
+    tag = 'sealedSecret'
+
+    def _is_valid(self, value):
+        # pylint: disable=broad-except
+        try:
+            kind = value.get("kind", value.get("Kind"))
+            if kind not in "SealedSecret":
+                raise Exception("Could not find valid SealedSecret")
+        except Exception:  # pragma: NO COVER
+            return False
+        return True
+
+
+VALIDATORS = DefaultValidators.copy()  # This is a dictionary
+VALIDATORS[Version.tag] = Version
+VALIDATORS[SealedSecret.tag] = SealedSecret
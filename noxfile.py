@@ -81,3 +81,34 @@ def cover(session):
     session.run('coverage', 'report', '--show-missing',
                 '--fail-under={}'.format(COVERAGE_FAIL))
     session.run('coverage', 'erase')
+
+
+@nox.session(python="3")
+def benchmark(session):
+    """Run the pipeline benchmark on synthetic manifests.
+    Timings of every stage are written to benchmark.json, or the file given
+    with --output, to compare across commits. Other arguments are passed to
+    the benchmark, e.g. `nox -s benchmark -- --releases 100 50000`.
+    """
+    session.install('.')
+    session.run('python', '-m', 'tests.benchmarks.bench_pipeline', *session.posargs)
+
+
+@nox.session(python="3")
+def benchmark_memory(session):
+    """Run the memory benchmark on a synthetic manifest.
+    Peak RSS of loading and generating it, with and without compact loading,
+    is written to benchmark-memory.json, or the file given with --output.
+    """
+    session.install('.')
+    session.run('python', '-m', 'tests.benchmarks.bench_memory', *session.posargs)
+
+
+@nox.session(python="3")
+def benchmark_dump(session):
+    """Run the dump benchmark on synthetic manifests with large values.
+    Timings are written to benchmark-dump.json, or the file given with
+    --output.
+    """
+    session.install('.')
+    session.run('python', '-m', 'tests.benchmarks.bench_dump', *session.posargs)
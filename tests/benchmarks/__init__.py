@@ -0,0 +1 @@
+# pylint: disable=import-error
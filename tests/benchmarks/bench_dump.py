@@ -0,0 +1,92 @@
+# MIT License
+#
+# (C) Copyright [2026] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+""" Benchmark dumping synthetic manifests that carry large embedded values,
+certificate bundles and sealed secrets, and write the timings as JSON.
+
+    python -m tests.benchmarks.bench_dump [--releases N] [--sizes MB [MB ...]]
+        [--repeat N] [--output FILE]
+"""
+# pylint: disable=import-error
+import argparse
+import time
+
+from manifestgen import ioutils
+from tests.benchmarks.bench_pipeline import synthetic_manifest, write_report
+
+
+def certificate_bundle(size):
+    """ A PEM certificate bundle of about `size` bytes """
+    certificate = ('-----BEGIN CERTIFICATE-----\n' + ('MIIDdzCCAl+gAwIBAgIE' * 3 + 'AQAB\n') * 20 +
+                   '-----END CERTIFICATE-----\n')
+    return certificate * max(1, size // len(certificate))
+
+
+def sealed_secret(size):
+    """ A single line encrypted value of `size` bytes """
+    return ('AgB' + 'x7Kq2Zr9' * (size // 8))[:size]
+
+
+def synthetic_data(releases, size):
+    """ manifests/v1 data where one release carries a `size` bytes
+    certificate bundle and another a `size` bytes sealed secret """
+    data = synthetic_manifest(releases)
+    charts = data['spec']['releases']
+    charts[0]['spec']['chart']['values']['ca'] = {'bundle': certificate_bundle(size)}
+    charts[-1]['spec']['chart']['values']['sealedSecrets'] = {'password': sealed_secret(size)}
+    return data
+
+
+def bench(data, repeat):
+    """ Best time of dumping `data` over `repeat` runs """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        ioutils.dump(data)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    """ Run the benchmark """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--releases', type=int, default=100)
+    parser.add_argument('--sizes', metavar='MB', type=float, nargs='+', default=[1, 4, 16],
+                        help='Size of each large value')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', metavar='FILE', default='benchmark-dump.json')
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'MB':>6} {'dump':>10}")
+    for size in args.sizes:
+        data = synthetic_data(args.releases, int(size * 2**20))
+        seconds = bench(data, args.repeat)
+        results.append({'size_mb': size, 'seconds': seconds})
+        print(f'{size:>6} {seconds:>9.3f}s')
+
+    write_report(args.output, {key: value for key, value in vars(args).items()
+                               if key != 'output'}, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+# MIT License
+#
+# (C) Copyright [2026] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+""" Benchmark the peak memory of loading, then generating, a large synthetic
+manifest with the default and the compact yaml loading, and write the results
+as JSON.
+
+    python -m tests.benchmarks.bench_memory [--releases N] [--customized N]
+        [--output FILE]
+
+Every run happens in a fresh process, since peak RSS only ever grows.
+"""
+# pylint: disable=import-error
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+from manifestgen import generate, ioutils
+from tests.benchmarks.bench_pipeline import (synthetic_customizations, synthetic_manifest,
+                                             write_report)
+
+MODES = ('default', 'compact')
+
+
+def _max_rss():
+    """ Peak RSS of this process in bytes """
+    # ru_maxrss can include the RSS of the parent before exec on Linux
+    try:
+        with open('/proc/self/status', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def child(mode, manifest_path, customizations_path):
+    """ Load the manifest, then generate it, and print the peak RSS before,
+    after loading and after generating """
+    ioutils.set_compact(mode == 'compact')
+    with open(manifest_path, encoding='utf-8') as f:
+        manifest_text = f.read()
+    with open(customizations_path, encoding='utf-8') as f:
+        customizations_text = f.read()
+    baseline = _max_rss()
+    data = ioutils.load(manifest_text)
+    loaded = _max_rss()
+    del data
+    generate.generate_text(manifest_text, customizations_text)
+    print(json.dumps({'baseline': baseline, 'load': loaded, 'generate': _max_rss()}))
+
+
+def bench(mode, manifest_path, customizations_path):
+    """ Peak RSS of loading and generating the manifest in a new process """
+    result = subprocess.run(
+        [sys.executable, '-m', 'tests.benchmarks.bench_memory', '--child', mode,
+         manifest_path, customizations_path],
+        check=True, capture_output=True, text=True)
+    return json.loads(result.stdout)
+
+
+def main():
+    """ Run the benchmark """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--releases', type=int, default=20000)
+    parser.add_argument('--customized', type=int, default=200,
+                        help='Releases with customizations, every other one of the first N')
+    parser.add_argument('--output', metavar='FILE', default='benchmark-memory.json')
+    parser.add_argument('--child', nargs=3, metavar=('MODE', 'MANIFEST', 'CUSTOMIZATIONS'),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manifest_path = os.path.join(tmp, 'manifest.yaml')
+        customizations_path = os.path.join(tmp, 'customizations.yaml')
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            ioutils.dump(synthetic_manifest(args.releases), f)
+        with open(customizations_path, 'w', encoding='utf-8') as f:
+            ioutils.dump(synthetic_customizations(args.customized, 5, 5, 5), f)
+        results = []
+        # Peak RSS, and how much it grew from before loading, in MB
+        print(f"{'mode':>9} {'load peak':>12} {'load growth':>12} {'generate peak':>14} "
+              f"{'generate growth':>16}")
+        for mode in MODES:
+            rss = bench(mode, manifest_path, customizations_path)
+            results.append({'mode': mode, **{f'{key}_rss_bytes': value
+                                             for key, value in rss.items()}})
+            print(f"{mode:>9} {rss['load'] / 2**20:>10.1f}MB "
+                  f"{(rss['load'] - rss['baseline']) / 2**20:>10.1f}MB "
+                  f"{rss['generate'] / 2**20:>12.1f}MB "
+                  f"{(rss['generate'] - rss['baseline']) / 2**20:>14.1f}MB")
+
+    write_report(args.output, {key: value for key, value in vars(args).items()
+                               if key not in ('output', 'child')}, results)
+
+
+if __name__ == '__main__':
+    main()
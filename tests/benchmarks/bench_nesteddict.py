@@ -0,0 +1,78 @@
+# MIT License
+#
+# (C) Copyright [2026] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+""" Microbenchmark NestedDict deep gets against the previous implementation,
+which copied the top level of the dict on every call.
+
+    python -m tests.benchmarks.bench_nesteddict [--keys N] [--number N]
+"""
+# pylint: disable=import-error
+import argparse
+import functools
+import timeit
+
+from manifestgen import nesteddict
+from manifestgen.nesteddict import NestedDict
+
+
+class CopyingNestedDict(dict):
+    """ NestedDict.get as it was before deep gets stopped copying """
+
+    def get(self, key, default=None):
+        keys = key.split('.')
+        found = {}
+
+        # pylint: disable=invalid-name
+        for k, v in self.items():
+            found[k] = v
+        for k in keys:
+            if not isinstance(found, dict):
+                return default
+            found = found.get(k)
+            if found is None:
+                return default
+        return found
+
+
+def main():
+    """ Run the benchmark """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--keys', type=int, default=20, help='Top level keys')
+    parser.add_argument('--number', type=int, default=200000)
+    args = parser.parse_args()
+
+    data = {f'key{i}': i for i in range(args.keys)}
+    data['metadata'] = {'name': 'some-chart', 'namespace': 'services'}
+    data['spec'] = {'chart': {'values': {'global': {'domain': 'shasta.local'}}}}
+    domain = 'spec.chart.values.global.domain'
+    cases = [
+        ('copying get', functools.partial(CopyingNestedDict(data).get, domain)),
+        ('deep get', functools.partial(NestedDict(data).get, domain)),
+        ('copying name', functools.partial(CopyingNestedDict(data).get, 'metadata.name')),
+        ('compiled name', functools.partial(nesteddict.getter('metadata.name'), data)),
+    ]
+    for label, func in cases:
+        elapsed = min(timeit.repeat(func, number=args.number, repeat=3))
+        print(f"{label:15} {elapsed / args.number * 1e9:8.0f} ns/call")
+
+
+if __name__ == '__main__':
+    main()
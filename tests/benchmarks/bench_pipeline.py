@@ -0,0 +1,211 @@
+# MIT License
+#
+# (C) Copyright [2026] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+""" Benchmark every stage of generating a manifest on synthetic data, from
+100 up to tens of thousands of releases, and write the timings as JSON.
+
+    python -m tests.benchmarks.bench_pipeline [--releases N [N ...]]
+        [--chain-depth N] [--leaves N] [--value-lines N] [--repeat N]
+        [--output FILE]
+"""
+# pylint: disable=import-error
+import argparse
+import copy
+import io
+import json
+import platform
+import subprocess
+import time
+from datetime import datetime, timezone
+
+from manifestgen import customizations, generate, ioutils, validator
+from manifestgen.customizations import Customizations
+from manifestgen.schema import new_schema
+
+STAGES = ('load', 'render', 'merge', 'validate_changed', 'validate', 'dump')
+
+
+def release_name(i):
+    """ Name of the i-th synthetic release """
+    return f'chart-{i}'
+
+
+def synthetic_manifest(releases):
+    """ manifests/v1 data with `releases` releases """
+    return {
+        'apiVersion': 'manifests/v1',
+        'metadata': {'name': f'synthetic-{releases}'},
+        'spec': {'releases': [{
+            'apiVersion': 'helm.fluxcd.io/v1',
+            'kind': 'HelmRelease',
+            'metadata': {'name': release_name(i), 'namespace': 'services'},
+            'spec': {'chart': {
+                'name': release_name(i),
+                'version': f'1.{i % 10}.{i}',
+                'values': {'replicas': 1, 'image': {'tag': f'1.{i}.0'}},
+            }},
+        } for i in range(releases)]},
+    }
+
+
+def synthetic_customizations(releases, chain_depth, leaves, value_lines):
+    """ customizations/v1 data customizing every other release with templated
+    leaves, a value at the end of a `chain_depth` long chain of references and
+    a `value_lines` long multi-line value.
+    """
+    chain = {'link0': 'start'}
+    for i in range(1, chain_depth):
+        chain[f'link{i}'] = f'{{{{ chain.link{i - 1} }}}}-{i}'
+    certificate = '\n'.join(f'line {i} ' + 'x' * 60 for i in range(value_lines)) + '\n'
+    spec = {
+        'network': {'static_ips': {'api_gw': '10.252.1.1'}, 'port': 8443},
+        'dns': {'domains': {'base': 'shasta.local'}},
+        'features': {'enabled': True, 'zones': ['a', 'b', 'c']},
+        'chain': chain,
+        'kubernetes': {'services': {}},
+    }
+    templates = (
+        '{{ network.static_ips.api_gw }}',
+        '{{ network.port }}',
+        '{{ features.enabled }}',
+        '{{ features.zones }}',
+        'https://{{ dns.domains.base }}:{{ network.port }}/api',
+    )
+    for i in range(0, releases, 2):
+        values = {f'leaf{j}': templates[j % len(templates)] for j in range(leaves)}
+        values['chained'] = f'{{{{ chain.link{chain_depth - 1} }}}}'
+        values['tls'] = {'certificate': certificate}
+        spec['kubernetes']['services'][release_name(i)] = values
+    return {
+        'apiVersion': 'customizations/v1',
+        'metadata': {'name': 'synthetic'},
+        'spec': spec,
+    }
+
+
+def _skip_validation(*_args, **_kwds):
+    """ Stands in for Manifest.validate to time merging on its own """
+
+
+def run_once(manifest_data, customizations_text):
+    """ Wall time of every stage of generating the manifest once """
+    timings = {}
+
+    start = time.perf_counter()
+    custom = Customizations.load(io.StringIO(customizations_text))
+    timings['load'] = time.perf_counter() - start
+
+    # A second render pass over freshly loaded data, with warm caches
+    spec = ioutils.load(customizations_text)['spec']
+    start = time.perf_counter()
+    customizations.resolve(spec)
+    timings['render'] = time.perf_counter() - start
+
+    manifest = new_schema(manifest_data)
+    manifest.validate = _skip_validation
+    start = time.perf_counter()
+    generate.manifestgen(manifest, custom)
+    timings['merge'] = time.perf_counter() - start
+    del manifest.validate
+
+    changed = [idx for idx, release in enumerate(manifest.get(manifest.CHARTS_REF))
+               if custom.get_chart(manifest.release_name(release))]
+    start = time.perf_counter()
+    manifest.validate(sorted(changed))
+    timings['validate_changed'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    manifest.validate()
+    timings['validate'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    manifest.dump()
+    timings['dump'] = time.perf_counter() - start
+    return timings
+
+
+def bench(releases, args):
+    """ Best time of each stage over `args.repeat` runs """
+    manifest_data = synthetic_manifest(releases)
+    customizations_text = ioutils.dump(synthetic_customizations(
+        releases, args.chain_depth, args.leaves, args.value_lines))
+    # Schema compilation is a one-off, keep it out of the validate timings
+    validator.get_schema(manifest_data['apiVersion'])
+    best = {}
+    for _ in range(args.repeat):
+        timings = run_once(copy.deepcopy(manifest_data), customizations_text)
+        for stage in STAGES:
+            best[stage] = min(best.get(stage, timings[stage]), timings[stage])
+    return best
+
+
+def _commit():
+    """ The git commit benchmarked, if known """
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], check=True, capture_output=True,
+                              text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_report(path, parameters, results):
+    """ Write benchmark results as JSON, along with what was benchmarked """
+    report = {
+        'commit': _commit(),
+        'date': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'yaml_backend': ioutils.get_backend(),
+        'parameters': parameters,
+        'results': results,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+        f.write('\n')
+    print(f"results written to {path}")
+
+
+def main():
+    """ Run the benchmark """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--releases', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--chain-depth', type=int, default=50,
+                        help='Length of the chain of references customizations go through')
+    parser.add_argument('--leaves', type=int, default=20,
+                        help='Templated values per customized release')
+    parser.add_argument('--value-lines', type=int, default=100,
+                        help='Lines of the multi-line value of each customized release')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', metavar='FILE', default='benchmark.json')
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'releases':>9} " + ' '.join(f'{stage:>16}' for stage in STAGES))
+    for releases in args.releases:
+        best = bench(releases, args)
+        results.append({'releases': releases, 'seconds': best})
+        print(f'{releases:>9} ' + ' '.join(f'{best[stage]:>15.3f}s' for stage in STAGES))
+
+    write_report(args.output, {key: value for key, value in vars(args).items()
+                               if key != 'output'}, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+# MIT License
+#
+# (C) Copyright [2026] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+""" Benchmark rendering customizations with native types against re-parsing
+every rendered value as YAML.
+
+    python -m tests.benchmarks.bench_render [--services N] [--repeat N]
+"""
+# pylint: disable=import-error
+import argparse
+import copy
+import time
+
+from manifestgen import customizations
+
+
+def synthetic_spec(services):
+    """ Customizations spec with `services` charts of templated values """
+    spec = {
+        'network': {'static_ips': {'api_gw': '10.252.1.1'}, 'port': 8443},
+        'dns': {'domains': {'base': 'shasta.local'}},
+        'features': {'enabled': True, 'zones': ['a', 'b', 'c']},
+        'kubernetes': {'services': {}},
+    }
+    for i in range(services):
+        spec['kubernetes']['services'][f'service-{i}'] = {
+            'ip': '{{ network.static_ips.api_gw }}',
+            'port': '{{ network.port }}',
+            'enabled': '{{ features.enabled }}',
+            'zones': '{{ features.zones }}',
+            'host': f'service-{i}.{{{{ dns.domains.base }}}}',
+            'url': 'https://{{ dns.domains.base }}:{{ network.port }}/api',
+        }
+    return spec
+
+
+def bench(spec, native, repeat):
+    """ Best wall time of resolving a fresh copy of spec """
+    best = None
+    for _ in range(repeat):
+        data = copy.deepcopy(spec)
+        start = time.perf_counter()
+        customizations.resolve(data, native=native)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    """ Run the benchmark """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--services', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    spec = synthetic_spec(args.services)
+    # Warm the template caches so only rendering is measured
+    customizations.resolve(copy.deepcopy(spec))
+    customizations.resolve(copy.deepcopy(spec), native=False)
+
+    parsed = bench(spec, False, args.repeat)
+    native = bench(spec, True, args.repeat)
+    print(f"templated values: {args.services * 6}")
+    print(f"yaml re-parse:    {parsed:.3f}s")
+    print(f"native:           {native:.3f}s ({parsed / native:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
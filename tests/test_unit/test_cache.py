@@ -0,0 +1,132 @@
+# MIT License
+#
+# (C) Copyright [2026] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+""" Test the output cache """
+# pylint: disable=import-error, invalid-name
+import os
+
+import pytest
+import yaml
+
+from manifestgen import generate, ioutils
+from manifestgen.cache import OutputCache, environment_digest
+
+TEST_FILES = os.path.join(os.path.dirname(__file__), '..', 'files')
+
+
+def _read(name):
+    with open(os.path.join(TEST_FILES, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def test_key(tmp_path):
+    """ Test every input changes the key """
+    values = tmp_path / 'values'
+    values.mkdir()
+    (values / 'chart.yaml').write_text('a: 1\n', encoding='utf-8')
+    keys = {
+        OutputCache.key('manifest'),
+        OutputCache.key('manifest', ''),
+        OutputCache.key('manifest2'),
+        OutputCache.key('manifest', 'customizations'),
+        OutputCache.key('manifest', 'customizations', str(values)),
+    }
+    (values / 'chart.yaml').write_text('a: 2\n', encoding='utf-8')
+    keys.add(OutputCache.key('manifest', 'customizations', str(values)))
+    # Separate inputs can not run into each other
+    keys.add(OutputCache.key('manife', 'stcustomizations'))
+    assert len(keys) == 6
+    assert OutputCache.key('manifest', 'customizations') == \
+        OutputCache.key('manifest', 'customizations')
+
+
+@pytest.mark.skipif(not yaml.__with_libyaml__, reason="libyaml is not available")
+def test_key_backend():
+    """ Test the yaml backend changes the key """
+    try:
+        ioutils.set_backend(ioutils.PYTHON_BACKEND)
+        python_digest, python_key = environment_digest(), OutputCache.key('manifest')
+        ioutils.set_backend(ioutils.C_BACKEND)
+        assert environment_digest() != python_digest
+        assert OutputCache.key('manifest') != python_key
+    finally:
+        ioutils.set_backend()
+
+
+def test_put_failure(tmp_path):
+    """ Test a failed write leaves no temporary file behind """
+    cache = OutputCache(str(tmp_path))
+    (tmp_path / 'key.manifest').mkdir()
+    (tmp_path / 'key.manifest' / 'file').write_text('', encoding='utf-8')
+    cache.put('key', 'a: 1\n')
+    assert [p.name for p in tmp_path.iterdir()] == ['key.manifest']
+
+
+def test_generate_text(tmp_path):
+    """ Test generated manifests are cached and served from the cache """
+    cache = OutputCache(str(tmp_path))
+    manifest, customizations = _read('manifests_v1.yaml'), _read('customizations_v1.yaml')
+    output = generate.generate_text(manifest, customizations, cache=cache)
+    assert output == generate.generate_text(manifest, customizations)
+
+    key = cache.key(manifest, customizations)
+    assert cache.get(key) == output
+    cache.put(key, 'cached: true\n')
+    assert generate.generate_text(manifest, customizations, cache=cache) == 'cached: true\n'
+
+
+def test_verify(tmp_path):
+    """ Test corrupt entries are dropped """
+    cache = OutputCache(str(tmp_path))
+    cache.put('good', 'a: 1\n')
+    cache.put('bad', 'b: 1\n')
+    cache.put('truncated', 'c: 1\n')
+    with open(tmp_path / 'bad.manifest', 'r+b') as f:
+        f.seek(-2, os.SEEK_END)
+        f.write(b'2')
+    with open(tmp_path / 'truncated.manifest', 'r+b') as f:
+        f.truncate(10)
+    assert cache.verify() == [str(tmp_path / 'bad.manifest'),
+                              str(tmp_path / 'truncated.manifest')]
+    assert not cache.verify()
+    assert cache.get('good') == 'a: 1\n'
+
+    cache.put('bad', 'b: 1\n')
+    with open(tmp_path / 'bad.manifest', 'ab') as f:
+        f.write(b'more')
+    assert cache.get('bad') is None
+    assert not (tmp_path / 'bad.manifest').exists()
+
+
+def test_evict(tmp_path):
+    """ Test the least recently used entries are evicted past the size limit """
+    cache = OutputCache(str(tmp_path), max_size=1100)
+    for i in range(3):
+        cache.put(f'entry{i}', 'x' * 200 + '\n')
+        os.utime(tmp_path / f'entry{i}.manifest', (i, i))
+    # Reading an entry makes it the most recently used
+    assert cache.get('entry0')
+    cache.put('entry3', 'x' * 400 + '\n')
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        'entry0.manifest', 'entry2.manifest', 'entry3.manifest']
+    cache.max_size = 0
+    assert cache.evict() == 3
+    assert cache.get('entry3') is None
@@ -0,0 +1,172 @@
+# MIT License
+#
+# (C) Copyright [2026] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+""" Test customizations loading and rendering """
+# pylint: disable=import-error, invalid-name
+import io
+import os
+
+import pytest
+
+from manifestgen import customizations, ioutils
+from manifestgen.customizations import Customizations
+
+TEST_FILES = os.path.join(os.path.dirname(__file__), '..', 'files')
+
+CUSTOMIZATIONSV1 = os.path.join(TEST_FILES, 'customizations_v1.yaml')
+
+
+def test_template_cache_shared_across_loads():
+    """ Test compiled templates are re-used across `Customizations.load` calls """
+    caches = (customizations.compile_template, customizations.compile_expression)
+    for cache in caches:
+        cache.cache_clear()
+    with open(CUSTOMIZATIONSV1, encoding='utf-8') as f:
+        first = Customizations.load(f)
+    misses = sum(cache.cache_info().misses for cache in caches)
+    assert misses > 0
+
+    with open(CUSTOMIZATIONSV1, encoding='utf-8') as f:
+        second = Customizations.load(f)
+    assert sum(cache.cache_info().misses for cache in caches) == misses
+    assert sum(cache.cache_info().hits for cache in caches) > 0
+    for cache in caches:
+        assert cache.cache_info().maxsize == customizations.TEMPLATE_CACHE_SIZE
+    assert first.get_chart('some-chart') == second.get_chart('some-chart')
+
+
+def _load(spec):
+    doc = "apiVersion: customizations/v1\nmetadata:\n  name: test\nspec:\n" + spec
+    return Customizations.load(io.StringIO(doc))
+
+
+def test_resolve_reference_chain():
+    """ Test forward references are rendered before the values using them """
+    c = _load(
+        "  a: '{{ b.c }}-a'\n"
+        "  b:\n"
+        "    c: '{{ d[0] }}-c'\n"
+        "  d:\n"
+        "    - '{{ e }}'\n"
+        "  e: 'e'\n"
+    )
+    assert c.get('spec.a') == 'e-c-a'
+    assert c.get('spec.b.c') == 'e-c'
+
+
+def test_template_refs():
+    """ Test context paths are read from templates """
+    refs = customizations.template_refs(
+        "{{ a.b['c-d'][0] }} {{ x[y.z].w }} {% for i in l %}{{ i.k }}{% endfor %}")
+    assert refs == {('a', 'b', 'c-d', 0), ('x',), ('y', 'z'), ('l',)}
+    refs = customizations.template_refs("{{ a.b.get(c.d, 'x') }} {{ e.items() | list }}")
+    assert refs == {('a', 'b'), ('c', 'd'), ('e',)}
+
+
+def test_resolve_cycle():
+    """ Test reference cycles are reported instead of looping forever """
+    with pytest.raises(ValueError) as e:
+        _load(
+            "  a: '{{ b }}'\n"
+            "  b:\n"
+            "    c: '{{ a }}'\n"
+        )
+    assert 'a -> b.c -> a' in str(e.value)
+    with pytest.raises(ValueError):
+        _load("  a: '{{ a }}'\n")
+
+
+def test_resolve_parent_reference():
+    """ Test templates reading a container they are in are not cycles """
+    c = _load(
+        "  net:\n"
+        "    count: '{{ net | length }}'\n"
+        "    b: 1\n"
+        "  other:\n"
+        "    x: '{{ other | length }}'\n"
+        "    y: '{{ other | length }}'\n"
+    )
+    assert c.get('spec.net.count') == 2
+    assert c.get('spec.other.x') == 2
+    assert c.get('spec.other.y') == 2
+
+
+def test_index_templates():
+    """ Test only templated strings are indexed """
+    obj = {'a': ['x', '{{ y }}'], 'b': {'c': 'plain {', 'd': 'z: {{ w }}'}, 'e': 1}
+    assert customizations.index_templates(obj) == {
+        ('a', 1): '{{ y }}',
+        ('b', 'd'): 'z: {{ w }}',
+    }
+    assert customizations.index_templates(obj['b'], ('b',)) == {('b', 'd'): 'z: {{ w }}'}
+
+
+def test_resolve_rendered_templates():
+    """ Test templates produced by rendering are rendered as well """
+    c = _load(
+        "  a: '{{ b }}'\n"
+        "  b: \"{{ '{{ c }}' }}\"\n"
+        "  c: 'c'\n"
+    )
+    assert c.get('spec.a') == 'c'
+    assert c.get('spec.b') == 'c'
+
+
+@pytest.mark.parametrize('source', [
+    "{{ s }}", "{{ s }}.x", "{{ n }}", "{{ n }}0", "{{ b }}", "{{ y }}", "{{ l }}",
+    "{{ d }}", "{{ d | toYaml }}", "{{ none }}", "{{ f }}", "{{ undefined }}",
+    "{{ q }}", "{{ h }}", "# {{ s }}", "{{ s }}\n{{ s }}\n", "{{- s -}}", "{{ ip }}",
+    "{{ date }}", "{{ lq }}", "{{ '{{ s }}' }}", "{{ s | e }}", "{{ s | safe }}",
+    "{{ s | forceescape }}", "{{ [s | e] }}",
+])
+def test_render_native_matches_yaml(source):
+    """ Test native rendering gives the same values as YAML parsing """
+    ctx = {
+        's': 'foo', 'n': 10, 'b': True, 'y': 'yes', 'l': ['a', 1, False],
+        'd': {'a': {'b': ['c', 'd']}, 1: 'e'}, 'none': None, 'f': 1.5,
+        'q': "it's", 'h': '#hash', 'ip': '192.168.1.1', 'date': '2020-01-01',
+        'lq': ["it's", None],
+    }
+    native = customizations.render_string(source, ctx)
+    parsed = customizations.render_string(source, ctx, native=False)
+    assert native == parsed
+    assert type(native) is type(parsed)
+    assert ioutils.load(ioutils.dump({'v': native})) == {'v': parsed}
+
+
+def test_load_fixme():
+    """ Test fixme values are reported with their line numbers """
+    doc = (
+        "apiVersion: customizations/v1\n"
+        "# comment: ~FIXME~\n"
+        "spec:\n"
+        "  a: ~FIXME~ ~FIXME~\n"
+        "    # ~FIXME~\n"
+        "  b: c\n"
+        "  d: ~FIXME~"
+    )
+    with pytest.raises(ValueError) as e:
+        Customizations.load(io.StringIO(doc))
+    assert str(e.value) == (
+        "~FIXME~ detected:\n"
+        " Line 4:   a: ~FIXME~ ~FIXME~\n"
+        "Line 7:   d: ~FIXME~"
+    )
@@ -21,8 +21,15 @@
 # OTHER DEALINGS IN THE SOFTWARE.
 """ Test the validator """
 # pylint: disable=import-error, invalid-name, superfluous-parens, protected-access
+import argparse
+import copy
+import io
+import json
 import os
+import subprocess
+import sys
 
+import pytest
 import semver
 
 from manifestgen import generate, ioutils, nesteddict
@@ -31,6 +38,10 @@ from manifestgen.schema import new_schema
 
 TEST_FILES = os.path.join(os.path.dirname(__file__), '..', 'files')
 
+# Seconds `import manifestgen.generate` may take, well above what it needs so
+# only pulling heavy dependencies back into startup trips it
+IMPORT_TIME_BUDGET = 0.5
+
 SCHEMAV2 = os.path.join(TEST_FILES, 'schema_v2.yaml')
 MANIFESTSV1BETA1 = os.path.join(TEST_FILES, 'manifests_v1beta1.yaml')
 MANIFESTSV1 = os.path.join(TEST_FILES, 'manifests_v1.yaml')
@@ -193,6 +204,50 @@ def test_generate_manifests_v1():
     assert some_chart.get('spec.chart.values.someNull.test') is None
     assert some_chart.get('spec.chart.values.someStaticNull') is None
 
+def test_generate_validates_changed_releases():
+    """ Test only customized releases are re-validated unless asked otherwise """
+    with open(CUSTOMIZATIONSV1, encoding='utf-8') as f:
+        customizations = Customizations.load(f)
+    with open(MANIFESTSV1, encoding='utf-8') as f:
+        data = ioutils.load(f)
+    other = copy.deepcopy(data['spec']['releases'][0])
+    other['metadata']['name'] = 'other-chart'
+    other['metadata']['namespace'] = None
+    other['spec']['chart']['version'] = 'not-a-version'
+    data['spec']['releases'].append(other)
+
+    generate.manifestgen(new_schema(copy.deepcopy(data)), customizations)
+    with pytest.raises(Exception) as e:
+        generate.manifestgen(new_schema(copy.deepcopy(data)), customizations, full_validation=True)
+    assert 'spec.releases.1.spec.chart.version' in str(e.value)
+
+def test_generate_no_aliases():
+    """ Test releases given the same customizations do not share them, which
+    would dump them as yaml anchors and aliases """
+    release = """\
+  - apiVersion: helm.fluxcd.io/v1
+    kind: HelmRelease
+    metadata: {{name: {0}, namespace: services}}
+    spec: {{chart: {{name: {0}, version: 1.0.0, values: {{}}}}}}
+"""
+    manifest = 'apiVersion: manifests/v1\nmetadata: {name: test}\nspec:\n  releases:\n' + \
+        ''.join(release.format(name) for name in ('a', 'a', 'b'))
+    customizations = """\
+apiVersion: customizations/v1
+metadata: {name: test}
+spec:
+  kubernetes:
+    services:
+      a: &common {x: {y: [1, 2]}}
+      b: *common
+"""
+    output = generate.generate_text(manifest, customizations)
+    assert '&' not in output and '*' not in output
+    releases = ioutils.load(output)['spec']['releases']
+    for release in releases:
+        assert release['spec']['chart']['values'] == {'x': {'y': [1, 2]}}
+
+
 def test_parse_chart_name():
     """ Test chart name parser """
     tests = [
@@ -207,3 +262,116 @@ def test_parse_chart_name():
         name, version = _parse_chart_name(test['chart_name'])
         assert name == test['name']
         assert version == test['version']
+
+def test_generate_batch(tmp_path):
+    """ Test generating many manifests with one customizations file """
+    with open(CUSTOMIZATIONSV1, encoding='utf-8') as f:
+        customizations = Customizations.load(f)
+    inputs = tmp_path / 'in'
+    inputs.mkdir()
+    for path in (MANIFESTSV1, MANIFESTSV1BETA1):
+        with open(path, encoding='utf-8') as f:
+            (inputs / os.path.basename(path)).write_text(f.read(), encoding='utf-8')
+    (inputs / 'broken.yaml').write_text('apiVersion: manifests/v0\n', encoding='utf-8')
+    (inputs / 'notes.txt').write_text('ignored', encoding='utf-8')
+
+    paths = generate.find_manifests([str(inputs)])
+    assert [os.path.basename(p) for p in paths] == [
+        'broken.yaml', 'manifests_v1.yaml', 'manifests_v1beta1.yaml']
+
+    out = tmp_path / 'out'
+    failed = generate.generate_batch(paths, str(out), customizations)
+    assert failed == [str(inputs / 'broken.yaml')]
+    assert sorted(os.listdir(out)) == ['manifests_v1.yaml', 'manifests_v1beta1.yaml']
+    with open(out / 'manifests_v1.yaml', encoding='utf-8') as f:
+        data = nesteddict.NestedDict(ioutils.load(f))
+    assert data.get('spec.releases')[0]['spec']['chart']['values']['domain'] == 'shasta.io'
+
+    with pytest.raises(ValueError):
+        generate.generate_batch([MANIFESTSV1, str(inputs / 'manifests_v1.yaml')], str(out))
+
+    # The same outputs in a process pool
+    parallel = tmp_path / 'parallel'
+    assert generate.generate_batch(paths, str(parallel), customizations, jobs=2) == failed
+    for name in os.listdir(out):
+        assert (parallel / name).read_bytes() == (out / name).read_bytes()
+
+
+def test_import_time():
+    """ Test importing the CLI leaves heavy dependencies for when they are used """
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        "import manifestgen.generate\n"
+        "elapsed = time.perf_counter() - start\n"
+        "heavy = ['jinja2', 'yamale', 'semver', 'pkg_resources', 'multiprocessing']\n"
+        "print(json.dumps([elapsed, [m for m in heavy if m in sys.modules]]))\n"
+    )
+    out = subprocess.run([sys.executable, '-c', code], check=True,
+                         capture_output=True, text=True).stdout
+    elapsed, loaded = json.loads(out)
+    assert loaded == []
+    assert elapsed < IMPORT_TIME_BUDGET
+    assert generate.get_version()
+
+
+def test_version(capsys):
+    """ Test --version prints the version to stdout and exits successfully """
+    parser = argparse.ArgumentParser(prog='manifestgen')
+    parser.add_argument('--version', action=generate.VersionAction)
+    with pytest.raises(SystemExit) as e:
+        parser.parse_args(['--version'])
+    assert e.value.code == 0
+    captured = capsys.readouterr()
+    assert captured.out == f'manifestgen {generate.get_version()}\n'
+    assert captured.err == ''
+
+
+class _LineReader:
+    """ Text stream returning at most a line per read, counting them """
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, text):
+        self.lines = iter(text.splitlines(keepends=True))
+        self.read_lines = 0
+
+    def read(self, _size=-1):
+        """ Read the next line """
+        line = next(self.lines, '')
+        self.read_lines += bool(line)
+        return line
+
+
+def test_generate_stream():
+    """ Test every document of a stream is generated, one at a time """
+    with open(MANIFESTSV1BETA1, encoding='utf-8') as f:
+        first = f.read()
+    with open(MANIFESTSV1, encoding='utf-8') as f:
+        second = f.read()
+    with open(CUSTOMIZATIONSV1, encoding='utf-8') as f:
+        customizations = f.read()
+    documents = [first, second, '---\n', first]
+    reader = _LineReader(''.join(documents))
+
+    class Output(io.StringIO):
+        """ Records how much input was read whenever output is flushed """
+        read_lines = []
+
+        def flush(self):
+            self.read_lines.append(reader.read_lines)
+
+    output = Output()
+    assert generate.generate_stream(reader, output, Customizations.load(
+        io.StringIO(customizations))) == 3
+    expected = [generate.generate_text(document, customizations)
+                for document in (first, second, first)]
+    assert output.getvalue() == ''.join(f'---\n{document}' for document in expected)
+    # Documents are written out before the ones after the next are read
+    read_lines = sorted(set(output.read_lines))
+    assert read_lines[0] <= len((first + second).splitlines())
+    assert read_lines[1] < len(''.join(documents).splitlines())
+
+    output = Output()
+    assert generate.generate_stream(io.StringIO(first + second), output,
+                                    validate_only=True) == 2
+    assert output.getvalue() == ''
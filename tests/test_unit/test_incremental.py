@@ -0,0 +1,128 @@
+# MIT License
+#
+# (C) Copyright [2026] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+""" Test incremental generation """
+# pylint: disable=import-error, invalid-name
+import copy
+
+from manifestgen import generate, incremental, ioutils
+
+
+def _manifest(versions):
+    return ioutils.dump({
+        'apiVersion': 'manifests/v1',
+        'metadata': {'name': 'test'},
+        'spec': {'releases': [{
+            'apiVersion': 'helm.fluxcd.io/v1',
+            'kind': 'HelmRelease',
+            'metadata': {'name': name, 'namespace': 'services'},
+            'spec': {'chart': {'name': name, 'version': version, 'values': {}}},
+        } for name, version in versions.items()]},
+    })
+
+
+CUSTOMIZATIONS = {
+    'apiVersion': 'customizations/v1',
+    'metadata': {'name': 'test'},
+    'spec': {
+        'network': {'ip': '10.0.0.1', 'host': 'example.com'},
+        'urls': {'api': 'https://{{ network.host }}/api'},
+        'kubernetes': {'services': {
+            'a': {'ip': '{{ network.ip }}'},
+            'b': {'url': '{{ urls.api }}', 'peer': '{{ kubernetes.services.c.name }}'},
+            'c': {'name': 'c-service'},
+        }},
+    },
+}
+
+
+def _customizations(**changes):
+    data = copy.deepcopy(CUSTOMIZATIONS)
+    for path, value in changes.items():
+        node = data['spec']
+        *keys, last = path.split('__')
+        for key in keys:
+            node = node[key]
+        node[last] = value
+    return ioutils.dump(data)
+
+
+def test_dependencies():
+    """ Test the customization paths releases depend on """
+    deps = incremental.Dependencies(ioutils.load(_customizations())['spec'])
+    services = ('kubernetes', 'services')
+    assert deps.release('a') == {services + ('a',), ('network', 'ip')}
+    assert deps.release('b') == {services + ('b',), ('urls', 'api'), ('network', 'host'),
+                                 services + ('c', 'name')}
+    assert deps.release('c') == {services + ('c',)}
+    assert deps.release('d') == {services + ('d',)}
+
+
+def _reused(previous, manifest, customizations, previous_deps):
+    """ Names of the releases copied from a previous output """
+    # Mark every release of the previous output to tell which are copied
+    data = ioutils.load(previous)
+    for release in data['spec']['releases']:
+        release['spec']['chart']['values']['reused'] = True
+    output, _ = incremental.generate(manifest, customizations, ioutils.dump(data),
+                                     previous_deps)
+    # Regenerated releases are the same as in a full run
+    expected = ioutils.load(generate.generate_text(manifest, customizations))
+    reused = set()
+    for release, full in zip(ioutils.load(output)['spec']['releases'],
+                             expected['spec']['releases']):
+        if release['spec']['chart']['values'].pop('reused', False):
+            reused.add(release['metadata']['name'])
+        assert release == full
+    return reused
+
+
+def test_generate():
+    """ Test only releases with changed inputs are regenerated """
+    manifest = _manifest({'a': '1.0.0', 'b': '1.0.0', 'c': '1.0.0'})
+    customizations = _customizations()
+    output, deps = incremental.generate(manifest, customizations)
+    assert output == generate.generate_text(manifest, customizations)
+
+    assert _reused(output, manifest, customizations, deps) == {'a', 'b', 'c'}
+    assert _reused(output, manifest, _customizations(network__ip='10.0.0.2'),
+                   deps) == {'b', 'c'}
+    assert _reused(output, manifest, _customizations(network__host='example.org'),
+                   deps) == {'a', 'c'}
+    assert _reused(output, manifest, _customizations(
+        kubernetes__services__c={'name': 'renamed'}), deps) == {'a'}
+    assert _reused(output, _manifest({'a': '1.0.0', 'b': '1.0.0', 'c': '1.0.1'}),
+                   customizations, deps) == {'a', 'b'}
+    assert _reused(output, _manifest({'c': '1.0.0', 'a': '1.0.0'}),
+                   customizations, deps) == {'a', 'c'}
+    assert _reused(output, manifest, customizations, dict(deps, environment='')) == set()
+
+
+def test_generate_method_call():
+    """ Test templates calling methods depend on the object they call them on """
+    manifest = _manifest({'a': '1.0.0', 'b': '1.0.0'})
+    calling = {'ip': "{{ network.get('ip') }}", 'keys': '{{ network.keys() | list }}'}
+    customizations = _customizations(kubernetes__services__a=calling)
+    output, deps = incremental.generate(manifest, customizations)
+    assert _reused(output, manifest, _customizations(
+        kubernetes__services__a=calling, network__ip='10.0.0.2'), deps) == {'b'}
+    assert _reused(output, manifest, _customizations(
+        kubernetes__services__a=calling, network__port=80), deps) == {'b'}
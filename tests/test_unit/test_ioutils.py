@@ -0,0 +1,208 @@
+# MIT License
+#
+# (C) Copyright [2026] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+""" Test yaml loading and dumping """
+# pylint: disable=import-error, invalid-name
+import datetime
+import os
+
+import pytest
+import yaml
+
+from manifestgen import ioutils
+
+TEST_FILES = os.path.join(os.path.dirname(__file__), '..', 'files')
+
+YAML_FILES = sorted(f for f in os.listdir(TEST_FILES) if f.endswith('.yaml'))
+
+BACKENDS = [
+    ioutils.PYTHON_BACKEND,
+    pytest.param(ioutils.C_BACKEND, marks=pytest.mark.skipif(
+        not yaml.__with_libyaml__, reason="libyaml is not available")),
+]
+
+SAMPLE = {
+    'multiline': 'Foo\nBar\n',
+    'multilineNoEnd': 'Foo\nBar',
+    'multilineComment': '# Foo\n#Bar\n',
+    'trailingSpace': 'Foo \nBar\n',
+    'leadingSpace': '  Foo\nBar\n',
+    'singleLine': 'Foo\n',
+    'empty': '',
+    'unicode': 'héllo wörld ✓',
+    'long': 'x' * 200 + ' ' + 'y' * 200,
+    'longEscaped': 'key\t' + 'word ' * 20,
+    'quotes': "it's \"quoted\"",
+    'special': ['yes', 'null', '1.0', '0x1F', '~', '- a', 'a: b', '#c'],
+    'types': [1, -2, 1.5, True, None, datetime.date(2020, 1, 1)],
+    'nested': {'a': {'b': [{'c': 'd'}, []], 'e': {}}},
+}
+
+
+@pytest.fixture(name='backend')
+def fixture_backend():
+    """ Restore the default yaml backend after a test """
+    yield
+    ioutils.set_backend()
+
+
+def _dump_with(backend_name, data):
+    ioutils.set_backend(backend_name)
+    return ioutils.dump(data)
+
+
+@pytest.mark.usefixtures('backend')
+@pytest.mark.parametrize('backend_name', BACKENDS)
+def test_multiline_block_scalar(backend_name):
+    """ Test multi-line strings are dumped as literal block scalars """
+    ioutils.set_backend(backend_name)
+    assert ioutils.get_backend() == backend_name
+    assert ioutils.dump({'a': 'Foo\nBar\n'}) == 'a: |\n  Foo\n  Bar\n'
+    assert ioutils.load(ioutils.dump(SAMPLE)) == SAMPLE
+
+
+@pytest.mark.skipif(not yaml.__with_libyaml__, reason="libyaml is not available")
+@pytest.mark.usefixtures('backend')
+@pytest.mark.parametrize('filename', YAML_FILES)
+def test_backends_identical(filename):
+    """ Test both backends load the same data and dump identical output """
+    with open(os.path.join(TEST_FILES, filename), encoding='utf-8') as f:
+        content = f.read()
+    ioutils.set_backend(ioutils.PYTHON_BACKEND)
+    data = ioutils.load(content)
+    ioutils.set_backend(ioutils.C_BACKEND)
+    assert ioutils.load(content) == data
+    assert _dump_with(ioutils.C_BACKEND, data) == _dump_with(ioutils.PYTHON_BACKEND, data)
+
+
+@pytest.mark.skipif(not yaml.__with_libyaml__, reason="libyaml is not available")
+@pytest.mark.usefixtures('backend')
+def test_backends_identical_sample():
+    """ Test both backends dump identical output for tricky values """
+    assert _dump_with(ioutils.C_BACKEND, SAMPLE) == _dump_with(ioutils.PYTHON_BACKEND, SAMPLE)
+
+
+@pytest.mark.usefixtures('backend')
+def test_unknown_backend():
+    """ Test selecting an unknown backend fails """
+    with pytest.raises(ValueError):
+        ioutils.set_backend('rust')
+
+
+@pytest.fixture(name='compact')
+def fixture_compact():
+    """ Restore compact loading after a test """
+    enabled = ioutils.get_compact()
+    yield
+    ioutils.set_compact(enabled)
+
+
+def _load_with(compact, content):
+    ioutils.set_compact(compact)
+    return ioutils.load(content)
+
+
+@pytest.mark.usefixtures('backend', 'compact')
+@pytest.mark.parametrize('backend_name', BACKENDS)
+@pytest.mark.parametrize('filename', YAML_FILES)
+def test_compact_identical(backend_name, filename):
+    """ Test compact loading loads the same data """
+    ioutils.set_backend(backend_name)
+    with open(os.path.join(TEST_FILES, filename), encoding='utf-8') as f:
+        content = f.read()
+    assert _load_with(True, content) == _load_with(False, content)
+    assert _load_with(True, ioutils.dump(SAMPLE)) == SAMPLE
+
+
+@pytest.mark.usefixtures('backend', 'compact')
+@pytest.mark.parametrize('backend_name', BACKENDS)
+def test_compact_yaml_features(backend_name):
+    """ Test compact loading of anchors, merge keys, tags and streams """
+    ioutils.set_backend(backend_name)
+    content = """\
+base: &base {a: 1, b: [1, 2]}
+alias: *base
+merged: {<<: *base, b: 3}
+merged_list: {<<: [{a: 2}, *base], c: 4}
+binary: !!binary aGVsbG8=
+key: !!str 123
+"""
+    data = _load_with(True, content)
+    assert data == _load_with(False, content)
+    assert data['alias'] is data['base']
+    assert data['merged'] == {'a': 1, 'b': 3}
+    assert data['merged_list'] == {'a': 2, 'b': [1, 2], 'c': 4}
+    assert _load_with(True, '') is None
+    assert list(ioutils.load_all('a: 1\n---\n[2]\n')) == [{'a': 1}, [2]]
+    with pytest.raises(yaml.YAMLError):
+        ioutils.load('a: 1\n---\nb: 2\n')
+    with pytest.raises(yaml.YAMLError):
+        ioutils.load('a: !!set {b}')
+    with pytest.raises(yaml.YAMLError):
+        ioutils.load('? [a]\n: b')
+    for merge in ('a: <<', '- <<', '<<', 'a: !!merge x'):
+        with pytest.raises(yaml.constructor.ConstructorError):
+            ioutils.load(merge)
+    assert ioutils.load('? <<\n: {a: 1}') == {'a': 1}
+
+
+@pytest.mark.usefixtures('compact')
+def test_compact_interning():
+    """ Test compact loading shares repeated strings """
+    data = _load_with(True, '- {namespace: services}\n- {namespace: services}\n')
+    (key0, value0), = data[0].items()
+    (key1, value1), = data[1].items()
+    assert key0 is key1
+    assert value0 is value1
+
+
+@pytest.mark.parametrize('text', [
+    '', 'a', 'a\n', 'a\nb', '\n', '\n\n', 'a\r\n', 'a\r\nb', 'a\rb', 'a\r', 'a\r\n\n',
+    'a\x85', 'a b', 'a\vb\n', 'a\fb', 'a\x1c', 'a\r\r\n',
+])
+def test_is_multiline(text):
+    """ Test multiline detection agrees with str.splitlines """
+    assert ioutils.is_multiline(text) == (len(text.splitlines()) > 1)
+
+
+class _StockDumper(yaml.SafeDumper):
+    """ Safe dumper with the stock emitter """
+    # pylint: disable=too-many-ancestors
+
+
+_StockDumper.add_representer(str, ioutils.str_presenter)
+
+
+@pytest.mark.parametrize('value', [
+    'MIIDdzCCAl+gAwIBAgIE\n' * 100,
+    '\n\n' + 'MIIDdzCCAl+gAwIBAgIE\n' * 100 + '\n\n',
+    '  indented\n' * 100 + 'no trailing newline',
+    'AgB' + 'x' * 1000,
+    'trailing space \n' * 100,
+    'ünïcödé\n' * 100,
+    '- a: b # c\n' * 100,
+])
+def test_long_scalars(value):
+    """ Test long strings dump the same as with the stock python emitter """
+    data = {'a': [value, {'b': value}]}
+    for kwds in ({}, {'allow_unicode': True}, {'encoding': 'utf-8'}):
+        assert yaml.dump_all([data], Dumper=ioutils.PySafeDumper, **kwds) == \
+            yaml.dump_all([data], Dumper=_StockDumper, **kwds)
@@ -0,0 +1,85 @@
+# MIT License
+#
+# (C) Copyright [2026] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+""" Test the nested dict helpers """
+# pylint: disable=import-error, invalid-name
+from manifestgen import nesteddict
+from manifestgen.nesteddict import NestedDict
+
+
+def test_get():
+    """ Test period separated gets """
+    inner = {'c': [1, 2], 'd': None, 'e': False}
+    d = NestedDict({'a': {'b': inner}, 'x': 'y'})
+    assert d.get('a.b') is inner
+    assert d.get('a.b.c') == [1, 2]
+    assert d.get('a.b.d', 'default') == 'default'
+    assert d.get('a.b.e', 'default') is False
+    assert d.get('a.b.c.d', 'default') == 'default'
+    assert d.get('x.y', 'default') == 'default'
+    assert d.get('missing') is None
+
+
+def test_getter():
+    """ Test compiled getters """
+    get_name = nesteddict.getter('metadata.name')
+    assert nesteddict.getter('metadata.name') is get_name
+    assert get_name({'metadata': {'name': 'foo'}}) == 'foo'
+    assert get_name({'metadata': 'foo'}, 'default') == 'default'
+    assert nesteddict.split_key('a.b.c') == ('a', 'b', 'c')
+
+
+def test_set_deep_copy_on_write():
+    """ Test deep sets only copy the modified path and never modify inputs """
+    shared = {'list': [1, 2], 'map': {'a': 1}}
+    untouched = {'z': 1}
+    chart = {'values': {'keep': 'me', 'shared': shared}, 'other': untouched}
+    release = NestedDict({'chart': chart})
+    update = {'shared': {'map': {'b': 2}}, 'new': ['x']}
+
+    release.set_deep('chart.values', update, update=True)
+    assert release.get('chart.values') == {
+        'keep': 'me',
+        'shared': {'list': [1, 2], 'map': {'a': 1, 'b': 2}},
+        'new': ['x'],
+    }
+    # Inputs are unchanged
+    assert chart == {'values': {'keep': 'me', 'shared': shared}, 'other': untouched}
+    assert shared == {'list': [1, 2], 'map': {'a': 1}}
+    assert update == {'shared': {'map': {'b': 2}}, 'new': ['x']}
+    # Only the updated path was copied
+    assert release['chart'] is not chart
+    assert release.get('chart.other') is untouched
+    assert release.get('chart.values.shared.list') is shared['list']
+    assert release.get('chart.values.new') is update['new']
+
+    release.set_deep('chart.values', {'replaced': True})
+    assert release.get('chart.values') == {'replaced': True}
+    assert release.get('chart.other') is untouched
+
+
+def test_merge():
+    """ Test copy-on-write merges """
+    base = NestedDict({'a': {'b': 1}, 'c': [1]})
+    merged = nesteddict.merge(base, {'a': {'d': 2}, 'c': [2]})
+    assert isinstance(merged, NestedDict)
+    assert merged == {'a': {'b': 1, 'd': 2}, 'c': [2]}
+    assert base == {'a': {'b': 1}, 'c': [1]}
@@ -0,0 +1,119 @@
+# MIT License
+#
+# (C) Copyright [2026] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+""" Test passing uncustomized releases through """
+# pylint: disable=import-error, invalid-name
+import pytest
+
+from manifestgen import generate, ioutils, stats
+
+CUSTOMIZATIONS = ioutils.dump({
+    'apiVersion': 'customizations/v1',
+    'metadata': {'name': 'test'},
+    'spec': {'kubernetes': {'services': {'b': {'replicas': 3}}}},
+})
+
+MANIFEST = """\
+apiVersion: manifests/v1
+metadata:
+    name: test
+spec:
+    releases:
+        # first release
+        -   apiVersion: helm.fluxcd.io/v1
+            kind: HelmRelease
+            metadata: {name: a, namespace: services}
+            spec:
+                chart:
+                    name: a
+                    version: 1.0.0
+                    values:
+                        enabled: True   # kept as is
+                        script: |
+                            echo a
+
+                            exit 0
+        -   apiVersion: helm.fluxcd.io/v1
+            kind: HelmRelease
+            metadata: {name: b, namespace: services}
+            spec:
+                chart: {name: b, version: 1.0.0, values: {enabled: True}}
+"""
+
+
+def test_passthrough():
+    """ Test uncustomized releases are copied verbatim """
+    stats.enable()
+    try:
+        output = generate.generate_text(MANIFEST, CUSTOMIZATIONS, passthrough=True)
+        assert stats.COUNTERS['releases_passed_through'] == 1
+    finally:
+        stats.disable()
+        stats.reset()
+    assert ioutils.load(output) == ioutils.load(generate.generate_text(MANIFEST, CUSTOMIZATIONS))
+    assert """\
+  - apiVersion: helm.fluxcd.io/v1
+    kind: HelmRelease
+    metadata: {name: a, namespace: services}
+    spec:
+        chart:
+            name: a
+            version: 1.0.0
+            values:
+                enabled: True   # kept as is
+                script: |
+                    echo a
+
+                    exit 0
+""" in output
+
+
+def test_passthrough_no_customizations():
+    """ Test every release is copied without customizations """
+    output = generate.generate_text(MANIFEST, passthrough=True)
+    assert output.count('enabled: True') == 2
+    assert ioutils.load(output) == ioutils.load(generate.generate_text(MANIFEST))
+
+
+def test_passthrough_aliases():
+    """ Test manifests with aliases are generated normally """
+    manifest = MANIFEST.replace('{name: a, namespace: services}',
+                                '{name: a, namespace: &ns services}')
+    manifest = manifest.replace('{name: b, namespace: services}', '{name: b, namespace: *ns}')
+    output = generate.generate_text(manifest, CUSTOMIZATIONS, passthrough=True)
+    assert output == generate.generate_text(manifest, CUSTOMIZATIONS)
+
+
+def test_passthrough_files():
+    """ Test the output of customized test manifests is unchanged """
+    with open('tests/files/customizations_v1.yaml', encoding='utf-8') as f:
+        customizations = f.read()
+    for name in ('manifests_v1.yaml', 'manifests_v1beta1.yaml'):
+        with open(f'tests/files/{name}', encoding='utf-8') as f:
+            manifest = f.read()
+        assert generate.generate_text(manifest, customizations, passthrough=True) == \
+            generate.generate_text(manifest, customizations)
+
+
+def test_passthrough_options():
+    """ Test passthrough refuses options it does not support """
+    with pytest.raises(ValueError):
+        generate.generate_text(MANIFEST, passthrough=True, full_validation=True)
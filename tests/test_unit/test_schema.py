@@ -0,0 +1,72 @@
+# MIT License
+#
+# (C) Copyright [2026] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+""" Test the schema objects """
+# pylint: disable=import-error, invalid-name
+import copy
+import os
+
+import pytest
+
+from manifestgen import ioutils
+from manifestgen.schema import ManifestV1, ManifestV1Beta1, SchemaV2, new_schema
+
+TEST_FILES = os.path.join(os.path.dirname(__file__), '..', 'files')
+
+
+@pytest.mark.parametrize('filename, cls, name', [
+    ('schema_v2.yaml', SchemaV2, 'cray-istio'),
+    ('manifests_v1beta1.yaml', ManifestV1Beta1, 'some-chart'),
+    ('manifests_v1.yaml', ManifestV1, 'some-chart'),
+])
+def test_release_index(filename, cls, name):
+    """ Test looking up and updating releases by name """
+    with open(os.path.join(TEST_FILES, filename), encoding='utf-8') as f:
+        data = ioutils.load(f)
+    original = copy.deepcopy(data)
+    manifest = new_schema(data)
+    assert isinstance(manifest, cls)
+
+    idx = manifest.release_index()[name][0]
+    release = manifest.get_release(name)
+    assert manifest.release_name(release) == name
+    assert manifest.get_release('does-not-exist') is None
+
+    manifest.update_release(idx, manifest.RELEASE_VALUES_REF, {'a': {'b': 1}}, update=True)
+    manifest.update_release(idx, manifest.RELEASE_VALUES_REF, {'a': {'c': 2}}, update=True)
+    values = manifest.get_release(name).get(manifest.RELEASE_VALUES_REF)
+    assert values['a'] == {'b': 1, 'c': 2}
+    # The loaded data is left untouched, other releases are shared
+    assert data == original
+    releases = manifest.get(manifest.CHARTS_REF)
+    for i, other in enumerate(data_releases(manifest, data)):
+        assert (releases[i] is other) == (i != idx)
+
+    manifest.update_release(idx, manifest.RELEASE_NAME_REF, 'renamed')
+    assert manifest.get_release(name) is None
+    assert manifest.get_release('renamed') is not None
+
+
+def data_releases(manifest, data):
+    """ Releases list of the raw data a manifest was built from """
+    for key in manifest.CHARTS_REF.split('.'):
+        data = data[key]
+    return data
@@ -0,0 +1,94 @@
+# MIT License
+#
+# (C) Copyright [2026] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+""" Test the generation server """
+# pylint: disable=import-error, invalid-name
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from manifestgen import generate, server
+
+TEST_FILES = os.path.join(os.path.dirname(__file__), '..', 'files')
+
+
+def _read(name):
+    with open(os.path.join(TEST_FILES, name), encoding='utf-8') as f:
+        return f.read()
+
+
+@pytest.fixture(name='socket_path')
+def fixture_socket_path(tmp_path):
+    """ Run a server for the duration of a test """
+    path = str(tmp_path / 'manifestgen.sock')
+    with server.Server(path) as s:
+        thread = threading.Thread(target=s.serve_forever)
+        thread.start()
+        yield path
+        s.shutdown()
+        thread.join()
+
+
+def test_requests(socket_path):
+    """ Test generating and validating """
+    manifest = _read('manifests_v1.yaml')
+    response = server.request(socket_path, 'generate', manifest=manifest,
+                              customizations=os.path.join(TEST_FILES, 'customizations_v1.yaml'))
+    assert response == {'ok': True, 'output': generate.generate_text(
+        manifest, _read('customizations_v1.yaml'))}
+    assert server.request(socket_path, 'validate', manifest=manifest) == {'ok': True}
+
+    response = server.request(socket_path, 'validate', manifest='apiVersion: manifests/v1\n')
+    assert not response['ok']
+    assert response['error'].startswith('Exception: Error validating manifest')
+    response = server.request(socket_path, 'render', manifest=manifest)
+    assert response == {'ok': False, 'error': 'ValueError: Unknown command: render'}
+
+
+def test_customizations_reloaded(socket_path, tmp_path):
+    """ Test customizations are loaded again once their file changes """
+    path = tmp_path / 'customizations.yaml'
+    customizations = _read('customizations_v1.yaml')
+    path.write_text(customizations, encoding='utf-8')
+    manifest = _read('manifests_v1.yaml')
+
+    first = server.request(socket_path, 'generate', manifest=manifest, customizations=str(path))
+    assert first == server.request(socket_path, 'generate', manifest=manifest,
+                                   customizations=str(path))
+    path.write_text(customizations.replace('192.168.1.1', '192.168.10.1'), encoding='utf-8')
+    second = server.request(socket_path, 'generate', manifest=manifest, customizations=str(path))
+    assert second['ok']
+    assert second['output'] == first['output'].replace('192.168.1.1', '192.168.10.1')
+    assert second['output'] != first['output']
+
+
+def test_concurrent_requests(socket_path):
+    """ Test requests answered at the same time get the same output """
+    manifest = _read('manifests_v1beta1.yaml')
+    customizations = os.path.join(TEST_FILES, 'customizations_v1.yaml')
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        responses = list(pool.map(
+            lambda _: server.request(socket_path, 'generate', manifest=manifest,
+                                     customizations=customizations), range(32)))
+    assert all(response['ok'] for response in responses)
+    assert len({response['output'] for response in responses}) == 1
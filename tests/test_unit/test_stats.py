@@ -0,0 +1,104 @@
+# MIT License
+#
+# (C) Copyright [2026] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+""" Test the stats """
+# pylint: disable=import-error, invalid-name
+import json
+import os
+import tracemalloc
+
+import pytest
+
+from manifestgen import generate, ioutils, stats
+from manifestgen.customizations import Customizations
+from manifestgen.schema import new_schema
+
+TEST_FILES = os.path.join(os.path.dirname(__file__), '..', 'files')
+
+
+@pytest.fixture(name='recording')
+def fixture_recording():
+    """ Record stats, memory included, for the duration of a test """
+    stats.enable(memory=True)
+    yield
+    stats.disable()
+    stats.reset()
+
+
+def test_no_memory():
+    """ Test memory is only tracked when asked for """
+    stats.enable()
+    try:
+        with stats.stage('a'):
+            assert not tracemalloc.is_tracing()
+        assert stats.report()['stages']['a']['peak_memory'] is None
+    finally:
+        stats.disable()
+        stats.reset()
+
+
+def test_disabled():
+    """ Test nothing is recorded unless enabled """
+    stats.count('a')
+    with stats.stage('b'):
+        pass
+    assert stats.report() == {'stages': {}, 'counters': {}}
+
+
+@pytest.mark.usefixtures('recording')
+def test_stage_nesting():
+    """ Test nested stages count towards the peak memory of outer stages """
+    with stats.stage('outer'):
+        with stats.stage('inner'):
+            data = bytearray(1 << 20)
+        del data
+        with stats.stage('inner'):
+            pass
+    report = stats.report()['stages']
+    assert report['inner']['calls'] == 2
+    assert report['inner']['peak_memory'] >= 1 << 20
+    assert report['outer']['peak_memory'] >= report['inner']['peak_memory']
+    assert report['outer']['wall'] >= report['inner']['wall']
+
+
+@pytest.mark.usefixtures('recording')
+def test_generate(tmp_path):
+    """ Test the stages and counters of generating a manifest """
+    with open(os.path.join(TEST_FILES, 'customizations_v1.yaml'), encoding='utf-8') as f:
+        customizations = Customizations.load(f)
+    with open(os.path.join(TEST_FILES, 'manifests_v1beta1.yaml'), encoding='utf-8') as f:
+        manifest = new_schema(ioutils.load(f))
+    generate.manifestgen(manifest, customizations)
+    manifest.dump()
+
+    report_file = tmp_path / 'timings.json'
+    stats.write_report(str(report_file))
+    report = json.loads(report_file.read_text(encoding='utf-8'))
+    assert set(report['stages']) >= {'parse', 'render', 'merge', 'validate', 'dump'}
+    for record in report['stages'].values():
+        assert record['calls'] >= 1
+        assert record['wall'] >= 0 and record['cpu'] >= 0
+        assert record['peak_memory'] >= 0
+    counters = report['counters']
+    assert counters['render_passes'] >= 1
+    assert counters['strings_rendered'] >= 1
+    assert counters['releases_merged'] == 1
+    assert counters['validations'] == 1
@@ -0,0 +1,129 @@
+# MIT License
+#
+# (C) Copyright [2026] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+""" Test manifest validation """
+# pylint: disable=import-error, invalid-name
+import copy
+import os
+
+import pytest
+
+from manifestgen import ioutils, validator
+from manifestgen.customizations import Customizations
+from manifestgen.schema import new_schema
+
+TEST_FILES = os.path.join(os.path.dirname(__file__), '..', 'files')
+
+MANIFESTSV1 = os.path.join(TEST_FILES, 'manifests_v1.yaml')
+CUSTOMIZATIONSV1 = os.path.join(TEST_FILES, 'customizations_v1.yaml')
+
+
+def _load(filename):
+    with open(filename, encoding='utf-8') as f:
+        return ioutils.load(f)
+
+
+@pytest.mark.parametrize('filename', ['manifests_v1beta1.yaml', 'manifests_v1.yaml'])
+def test_validate_in_memory(filename):
+    """ Test manifests validate from python data and from yaml strings """
+    data = _load(os.path.join(TEST_FILES, filename))
+    assert validator.validate(data) is data
+    validator.validate(ioutils.dump(data))
+    new_schema(data).validate()
+
+
+def test_validate_errors():
+    """ Test in-memory validation reports the same errors as yaml strings """
+    data = _load(MANIFESTSV1)
+    release = data['spec']['releases'][0]
+    release['kind'] = 'Foo'
+    release['spec']['chart']['version'] = 'x'
+    errors = []
+    for manifest_data in (data, ioutils.dump(data)):
+        with pytest.raises(Exception) as e:
+            validator.validate(manifest_data)
+        errors.append(str(e.value))
+    assert errors[0] == errors[1]
+    assert "spec.releases.0.spec.chart.version: 'x' is not a version." in errors[0]
+
+
+def test_validate_sealed_secret():
+    """ Test the custom SealedSecret validator """
+    with open(CUSTOMIZATIONSV1, encoding='utf-8') as f:
+        customizations = Customizations.load(f)
+    customizations.set('spec.kubernetes.sealed_secrets', {'a': {'kind': 'SealedSecret'}})
+    customizations.validate()
+    customizations.set('spec.kubernetes.sealed_secrets', {'a': {'kind': 'Secret'}, 'b': {}})
+    with pytest.raises(Exception):
+        customizations.validate()
+
+
+def test_schema_registry():
+    """ Test schemas are compiled once per process """
+    s = validator.get_schema('manifests/v1')
+    assert validator.get_schema('manifests/v1') is s
+    with pytest.raises(Exception):
+        validator.get_schema('manifests/v0')
+
+
+def _invalid_manifest():
+    data = _load(MANIFESTSV1)
+    release = data['spec']['releases'][0]
+    data['spec']['releases'] = [copy.deepcopy(release) for _ in range(4)]
+    data['metadata']['name'] = None
+    data['metadata']['labels'] = 'x'
+    data['spec']['releases'][0]['kind'] = 'Foo'
+    data['spec']['releases'][0]['spec']['chart']['version'] = 'x'
+    data['spec']['releases'][2]['metadata']['namespace'] = 1
+    data['spec']['releases'][3]['metadata']['name'] = []
+    return data
+
+
+def _error(*args):
+    with pytest.raises(Exception) as e:
+        validator.validate(*args)
+    return str(e.value)
+
+
+def test_validate_releases():
+    """ Test validating selected releases reports the same errors as a full
+    validation of those releases """
+    data = _invalid_manifest()
+    assert _error(data, 'spec.releases', range(4)) == _error(data)
+
+    partial = _error(data, 'spec.releases', [2])
+    assert 'spec.releases.2.metadata.namespace' in partial
+    assert 'spec.releases.0' not in partial
+    # Header errors are still reported
+    assert 'metadata.labels' in partial
+    assert 'metadata.labels' in _error(data, 'spec.releases', [])
+
+
+def test_validate_parallel():
+    """ Test validating releases in a process pool matches serial validation """
+    data = _invalid_manifest()
+    assert _error(data, 'spec.releases', None, 2) == _error(data)
+    assert _error(data, 'spec.releases', [3, 2], 3) == _error(data, 'spec.releases', [3, 2])
+
+    with open(MANIFESTSV1, encoding='utf-8') as f:
+        manifest = new_schema(ioutils.load(f))
+    manifest.set_releases(manifest.get_releases() * 8)
+    manifest.validate(workers=2)